@@ -5,9 +5,10 @@ Clean startup with minimal logging
 
 import os
 import sys
+import asyncio
 import logging
 from pathlib import Path
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 
 # Disable oneDNN/MKLDNN for Windows compatibility
@@ -34,7 +35,8 @@ if not os.getenv("DATABASE_URL"):
 # FastAPI imports
 from fastapi import FastAPI, HTTPException, Request, status, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 import aiofiles
 import asyncpg
 import ssl
@@ -46,6 +48,7 @@ db_pool = None
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     global db_pool
+    heartbeat = None
     
     # Startup
     try:
@@ -59,22 +62,31 @@ async def lifespan(app: FastAPI):
         db_pool = None
         
         try:
+            from src.config.prisma import set_db_pool, init_connection, pool_heartbeat, PreparedConnection
+            
+            # Open the hot connections up front so early requests skip the handshake;
+            # every pooled connection prepares the hot statements when it is opened
             db_pool = await asyncpg.create_pool(
                 database_url,
-                min_size=1,
-                max_size=10,
+                min_size=int(os.getenv("DB_POOL_MIN_SIZE", "10")),
+                max_size=int(os.getenv("DB_POOL_MAX_SIZE", "40")),
+                max_inactive_connection_lifetime=300,
                 command_timeout=60,
-                ssl=ssl_context
+                ssl=ssl_context,
+                connection_class=PreparedConnection,
+                init=init_connection
             )
             
             # Set the pool for prisma module
-            from src.config.prisma import set_db_pool
             set_db_pool(db_pool)
             
             # Test database connection
             async with db_pool.acquire() as conn:
                 await conn.fetchval("SELECT 1")
             
+            # Keep idle connections from being dropped between bursts
+            heartbeat = asyncio.create_task(pool_heartbeat(db_pool))
+            
             logger.info("✔ Database connected")
         except Exception as db_error:
             logger.warning(f"⚠ Database unavailable (OCR will still work): {str(db_error)[:50]}...")
@@ -83,6 +95,13 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Startup error: {str(e)}")
     
+    # Warm the face matching pipeline so the first request does not pay for it
+    from src.services.face_matching_service import get_face_matching_service
+    await asyncio.to_thread(get_face_matching_service().warmup)
+    
+    # Generate every model's JSON schema now rather than on the first /docs or /openapi.json hit
+    app.openapi()
+    
     # Log API registration
     logger.info("✔ APIs registered")
     logger.info("✔ Backend started at http://localhost:8000")
@@ -90,6 +109,11 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    if heartbeat:
+        heartbeat.cancel()
+        # Let an in-flight ping finish unwinding before the pool closes under it
+        with suppress(asyncio.CancelledError):
+            await heartbeat
     if db_pool:
         await db_pool.close()
 
@@ -108,7 +132,8 @@ app = FastAPI(
     title="Deep Defenders KYC Platform API",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS Configuration
@@ -125,14 +150,19 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Request latency metrics
+from src.utils.metrics import prometheus_middleware
+app.middleware("http")(prometheus_middleware)
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
+    # Unhandled errors are logged in full but never echoed back to the client
+    logger.exception(f"[API] Unhandled error on {request.url.path}: {str(exc)}")
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
-            "error": "Internal server error",
-            "message": str(exc),
+            "detail": "Internal server error",
             "path": request.url.path
         }
     )
@@ -156,6 +186,11 @@ async def root():
         "documentation": "/docs"
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
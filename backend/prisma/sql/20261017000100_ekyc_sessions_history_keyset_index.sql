@@ -0,0 +1,3 @@
+-- Keyset pagination for /e-kyc/history/my: (createdAt, id) DESC per user
+CREATE INDEX IF NOT EXISTS "ekyc_sessions_userId_createdAt_id_idx"
+    ON "ekyc_sessions"("userId", "createdAt" DESC, "id" DESC);
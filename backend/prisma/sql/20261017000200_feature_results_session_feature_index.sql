@@ -0,0 +1,5 @@
+-- Feature result lookups filter on (sessionId, featureName); the composite
+-- index also serves sessionId-only scans, so the single-column one goes
+DROP INDEX IF EXISTS "feature_results_sessionId_idx";
+CREATE INDEX IF NOT EXISTS "feature_results_sessionId_featureName_idx"
+    ON "feature_results"("sessionId", "featureName");
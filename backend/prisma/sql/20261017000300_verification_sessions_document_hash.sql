@@ -0,0 +1,4 @@
+-- Content hash of the uploaded images, used to dedup face-matching uploads per user
+ALTER TABLE "verification_sessions" ADD COLUMN IF NOT EXISTS "documentHash" TEXT;
+CREATE INDEX IF NOT EXISTS "verification_sessions_userId_documentHash_idx"
+    ON "verification_sessions"("userId", "documentHash");
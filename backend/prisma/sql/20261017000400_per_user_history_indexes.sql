@@ -0,0 +1,5 @@
+-- Per-user date-range stats and history listings
+CREATE INDEX IF NOT EXISTS "verification_sessions_userId_createdAt_idx"
+    ON "verification_sessions"("userId", "createdAt");
+CREATE INDEX IF NOT EXISTS "video_kyc_sessions_userId_sessionStartedAt_idx"
+    ON "video_kyc_sessions"("userId", "sessionStartedAt" DESC);
@@ -0,0 +1,5 @@
+-- Keyset pagination for Video KYC history: (sessionStartedAt, id) DESC per user,
+-- replacing the (userId, sessionStartedAt DESC) index
+DROP INDEX IF EXISTS "video_kyc_sessions_userId_sessionStartedAt_idx";
+CREATE INDEX IF NOT EXISTS "video_kyc_sessions_userId_sessionStartedAt_id_idx"
+    ON "video_kyc_sessions"("userId", "sessionStartedAt" DESC, "id" DESC);
@@ -29,30 +29,30 @@ async def register_user(user_data: UserRegister):
     Returns JWT tokens for immediate authentication after registration.
     """
     try:
-        # Check if user already exists
-        existing_user = await prisma.user.find_unique(
-            where={"email": user_data.email}
-        )
-        
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email address already registered"
-            )
-        
-        # Hash password
+        # Hash password before taking a connection, so bcrypt never holds one
         password_hash = AuthService.hash_password(user_data.password)
         
-        # Create user
-        new_user = await prisma.user.create({
-            "email": user_data.email,
-            "passwordHash": password_hash,
-            "firstName": user_data.firstName,
-            "lastName": user_data.lastName,
-            "phone": user_data.phone,
-            "role": "USER",
-            "status": "ACTIVE"  # Auto-activate for demo purposes
-        })
+        # Check and create on one connection, in one transaction
+        async with prisma.transaction() as conn:
+            existing_user = await prisma.user.find_unique(
+                where={"email": user_data.email}, conn=conn
+            )
+            
+            if existing_user:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Email address already registered"
+                )
+            
+            new_user = await prisma.user.create({
+                "email": user_data.email,
+                "passwordHash": password_hash,
+                "firstName": user_data.firstName,
+                "lastName": user_data.lastName,
+                "phone": user_data.phone,
+                "role": "USER",
+                "status": "ACTIVE"  # Auto-activate for demo purposes
+            }, conn=conn)
         
         # Create tokens
         tokens = create_user_tokens({
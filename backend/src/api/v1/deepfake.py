@@ -9,20 +9,20 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.responses import JSONResponse
 from typing import Dict, Any, Optional
 from datetime import datetime
+import base64
 import logging
 import tempfile
 import os
 import uuid
 import traceback
 
-from src.services.deepfake_service import DeepfakeService
+from src.services.deepfake_service import get_deepfake_service
 from src.utils.auth import get_current_active_user
 from src.config.prisma import prisma
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/deepfake", tags=["Deepfake Detection"])
-service = DeepfakeService()
 
 @router.post("/upload")
 async def upload_and_analyze(
@@ -85,13 +85,12 @@ async def upload_and_analyze(
         # Run analysis based on file type
         if is_video:
             logger.info("[DEEPFAKE] Analyzing video...")
-            analysis_result = service.analyze_video(temp_file_path)
+            analysis_result = get_deepfake_service().analyze_video(temp_file_path)
         else:
             logger.info("[DEEPFAKE] Analyzing image...")
             # Convert file to base64 for image analysis
-            import base64
             base64_content = base64.b64encode(content).decode('utf-8')
-            analysis_result = service.analyze_image(base64_content)
+            analysis_result = get_deepfake_service().analyze_image(base64_content)
         
         if "error" in analysis_result:
             logger.error(f"[DEEPFAKE] Analysis failed: {analysis_result['error']}")
@@ -181,13 +180,13 @@ async def upload_and_analyze(
 @router.get("/info")
 async def get_service_info():
     """Get information about the deepfake detection service."""
-    return service.get_model_info()
+    return get_deepfake_service().get_model_info()
 
 @router.get("/health")
 async def health_check():
     """Health check endpoint for service monitoring."""
     try:
-        model_info = service.get_model_info()
+        model_info = get_deepfake_service().get_model_info()
         return JSONResponse(
             status_code=200,
             content={
@@ -6,10 +6,14 @@ selfie capture, verification processing, and session history.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi.responses import ORJSONResponse
+from functools import lru_cache
 from typing import Optional
+import asyncio
 import logging
 import os
 import tempfile
+import traceback
 from pathlib import Path
 
 from src.schemas.ekyc import (
@@ -19,17 +23,47 @@ from src.schemas.ekyc import (
     EkycSessionHistoryResponse,
 )
 from src.services.ekyc_service import EkycService
-from src.services.ocr_service import OCRService
+from src.services.ocr_service import get_ocr_service
 from src.services.document_extractor import DocumentExtractor
+from src.services.face_matching_service import get_face_matching_service
 from src.utils.auth import get_current_user
+from src.utils.executor import CPU_POOL
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.responses import ekyc_history_response
+from src.utils.uploads import read_upload
+from src.utils.metrics import (
+    DB_INSERT_SECONDS,
+    FACE_MATCH_SECONDS,
+    OCR_SECONDS,
+    UPLOAD_READ_SECONDS,
+)
 from src.config.prisma import get_db_pool
 
-router = APIRouter(prefix="/e-kyc", tags=["E-KYC"])
+router = APIRouter(prefix="/e-kyc", tags=["E-KYC"], default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 # Initialize services
-ocr_service = OCRService()
+ocr_service = get_ocr_service()
 document_extractor = DocumentExtractor()
+face_service = get_face_matching_service()
+
+# Document types accepted by the upload endpoint
+_VALID_DOC_TYPES = frozenset({"AADHAAR", "PAN_CARD", "DRIVERS_LICENSE"})
+_INVALID_DOC_TYPE_DETAIL = "Invalid document type. Must be one of: AADHAAR, PAN_CARD, DRIVERS_LICENSE"
+
+# Upload limits, matching the face matching and fake document routers
+_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+_MAX_DOCUMENT_BYTES = 10 * 1024 * 1024
+
+# Scratch directory for uploaded documents awaiting OCR
+_EKYC_TMP = Path(tempfile.gettempdir()) / "ekyc_uploads"
+_EKYC_TMP.mkdir(exist_ok=True)
+
+
+@lru_cache(maxsize=1)
+def _service() -> EkycService:
+    """Shared e-KYC service bound to the application database pool"""
+    return EkycService(get_db_pool())
 
 
 @router.post("/start")
@@ -44,8 +78,7 @@ async def start_ekyc_session():
     """
     try:
         logger.info("[EKYC] Session start requested (anonymous)")
-        db_pool = get_db_pool()
-        service = EkycService(db_pool)
+        service = _service()
         
         session = await service.create_session(
             user_id=None,
@@ -103,32 +136,29 @@ async def upload_document(
         logger.info(f"[EKYC] upload received for session: {session_id}, doc type: {document_type}")
         
         # Validate document type
-        valid_types = ["AADHAAR", "PAN_CARD", "DRIVERS_LICENSE"]
-        if document_type not in valid_types:
+        if document_type not in _VALID_DOC_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid document type. Must be one of: {', '.join(valid_types)}"
+                detail=_INVALID_DOC_TYPE_DETAIL
             )
         
-        db_pool = get_db_pool()
-        service = EkycService(db_pool)
+        service = _service()
         
-        # Verify session exists
-        session = await service.get_session(session_id)
-        if not session:
+        # Verify session exists, fetching only its internal id
+        db_session_id = await service.get_session_id(session_id)
+        if not db_session_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
             )
         
         # Read image data
-        image_data = await document_image.read()
+        with UPLOAD_READ_SECONDS.time():
+            image_data = await read_upload(document_image, _MAX_DOCUMENT_BYTES)
         logger.info(f"[EKYC] Image received: {len(image_data)} bytes")
         
         # Save to temp file for OCR processing
-        temp_dir = Path(tempfile.gettempdir()) / "ekyc_uploads"
-        temp_dir.mkdir(exist_ok=True)
-        temp_file = temp_dir / f"{session_id}_{document_type}.jpg"
+        temp_file = _EKYC_TMP / f"{session_id}_{document_type}.jpg"
         
         with open(temp_file, "wb") as f:
             f.write(image_data)
@@ -138,20 +168,16 @@ async def upload_document(
         
         # Process OCR (this returns extracted data immediately)
         logger.info("[OCR] started")
-        ocr_result = await extract_document_data(
-            document_type=document_type,
-            image_path=image_path,
-            image_data=image_data
-        )
+        with OCR_SECONDS.time():
+            ocr_result = await extract_document_data(
+                document_type=document_type,
+                image_path=image_path,
+                image_data=image_data
+            )
         logger.info(f"[OCR] completed with confidence: {ocr_result['confidence']}")
         
         # Save document to database with extracted data
-        async with db_pool.acquire() as conn:
-            import uuid
-            from datetime import datetime
-            
-            document_id = str(uuid.uuid4())
-            
+        async with service.db_pool.acquire() as conn:
             # Build extracted data JSON
             extracted_json = {
                 "extractedFields": ocr_result.get("extractedFields", {}),
@@ -184,42 +210,40 @@ async def upload_document(
                 logger.warning(f"[EKYC] Document number NOT extracted from {document_type}")
                 doc_number = "Not extracted"
             
-            import json
-            await conn.execute(
-                '''
-                INSERT INTO "ekyc_documents" 
-                (id, "sessionId", type, "frontImageUrl", "documentNumber", "fullName", 
-                 "dateOfBirth", "isAuthentic", "confidenceScore", "tamperingDetected",
-                 "extractedData", "uploadedAt", "processedAt")
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
-                ''',
-                document_id,
-                session['id'],
-                document_type,
-                image_path,
-                doc_number,  # Already set above with proper fallback
-                ocr_result.get("name"),
-                ocr_result.get("dateOfBirth"),
-                ocr_result.get("confidence", 0) > 0.5,
-                ocr_result.get("confidence", 0),
-                False,
-                json.dumps(extracted_json),
-                datetime.utcnow(),
-                datetime.utcnow()
-            )
-            
-            # Update session status
-            await conn.execute(
-                '''
-                UPDATE "ekyc_sessions" 
-                SET status = $1, "documentScore" = $2, "updatedAt" = $3 
-                WHERE id = $4
-                ''',
-                "DOCUMENT_UPLOADED",
-                ocr_result.get("confidence", 0) * 100,
-                datetime.utcnow(),
-                session['id']
-            )
+            with DB_INSERT_SECONDS.time():
+                # id and timestamps are generated by Postgres
+                document_id = await conn.fetchval(
+                    '''
+                    INSERT INTO "ekyc_documents" 
+                    (id, "sessionId", type, "frontImageUrl", "documentNumber", "fullName", 
+                     "dateOfBirth", "isAuthentic", "confidenceScore", "tamperingDetected",
+                     "extractedData", "uploadedAt", "processedAt")
+                    VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW(), NOW())
+                    RETURNING id
+                    ''',
+                    db_session_id,
+                    document_type,
+                    image_path,
+                    doc_number,  # Already set above with proper fallback
+                    ocr_result.get("name"),
+                    ocr_result.get("dateOfBirth"),
+                    ocr_result.get("confidence", 0) > 0.5,
+                    ocr_result.get("confidence", 0),
+                    False,
+                    extracted_json
+                )
+                
+                # Update session status
+                await conn.execute(
+                    '''
+                    UPDATE "ekyc_sessions" 
+                    SET status = $1, "documentScore" = $2, "updatedAt" = NOW() 
+                    WHERE id = $3
+                    ''',
+                    "DOCUMENT_UPLOADED",
+                    ocr_result.get("confidence", 0) * 100,
+                    db_session_id
+                )
         
         logger.info(f"[DB] ekyc_document saved: {document_id}")
         logger.info(f"[EKYC] Document upload complete for session: {session_id}")
@@ -240,7 +264,6 @@ async def upload_document(
         raise
     except Exception as e:
         logger.error(f"[EKYC] Failed to upload document: {str(e)}")
-        import traceback
         traceback.print_exc()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -439,12 +462,11 @@ async def upload_selfie(
     Returns upload confirmation.
     """
     try:
-        db_pool = get_db_pool()
-        service = EkycService(db_pool)
+        service = _service()
         
-        # Verify session exists
-        session = await service.get_session(session_id)
-        if not session:
+        # Verify session exists, fetching only its internal id
+        db_session_id = await service.get_session_id(session_id)
+        if not db_session_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
@@ -456,7 +478,7 @@ async def upload_selfie(
         logger.info(f"[EKYC] Selfie uploaded for session: {session_id}")
         
         await service.upload_selfie(
-            session_id=session['id'],
+            session_id=db_session_id,
             selfie_url=selfie_url,
         )
         
@@ -495,12 +517,11 @@ async def match_faces(
     try:
         logger.info(f"[FACE-MATCH] Request received for session: {session_id}")
         
-        db_pool = get_db_pool()
-        service = EkycService(db_pool)
+        service = _service()
         
-        # Verify session exists
-        session = await service.get_session(session_id)
-        if not session:
+        # Verify session exists, fetching only its internal id
+        db_session_id = await service.get_session_id(session_id)
+        if not db_session_id:
             logger.warning(f"[FACE-MATCH] Session not found: {session_id}")
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -509,73 +530,67 @@ async def match_faces(
         
         # Read images
         logger.info("[FACE-MATCH] Reading images...")
-        id_image_data = await id_image.read()
-        selfie_image_data = await selfie_image.read()
+        with UPLOAD_READ_SECONDS.time():
+            id_image_data, selfie_image_data = await asyncio.gather(
+                read_upload(id_image, _MAX_IMAGE_BYTES),
+                read_upload(selfie_image, _MAX_IMAGE_BYTES)
+            )
         
         logger.info(f"[FACE-MATCH] ID image size: {len(id_image_data)} bytes")
         logger.info(f"[FACE-MATCH] Selfie image size: {len(selfie_image_data)} bytes")
         
-        # Import face matching service
-        from src.services.face_matching_service import get_face_matching_service
-        
-        face_service = get_face_matching_service()
-        
         # Perform face matching
         logger.info("[FACE-MATCH] Running face detection and matching...")
-        match_result = face_service.match_faces(
-            id_image_bytes=id_image_data,
-            selfie_image_bytes=selfie_image_data
-        )
+        # The shared CPU pool bounds how many matches run at once
+        with FACE_MATCH_SECONDS.time():
+            loop = asyncio.get_running_loop()
+            match_result = await loop.run_in_executor(
+                CPU_POOL, face_service.match_faces, id_image_data, selfie_image_data
+            )
         
         logger.info(f"[FACE-MATCH] Result: {match_result['decision']}, Score: {match_result['similarity_score']:.4f}")
         
         # Save result to database
-        async with db_pool.acquire() as conn:
-            import uuid
-            from datetime import datetime
-            
-            result_id = str(uuid.uuid4())
-            
-            await conn.execute(
-                '''
-                INSERT INTO "face_match_results"
-                (id, "sessionId", "idFaceDetected", "selfieFaceDetected", 
-                 "idFaceCount", "selfieFaceCount", "similarityScore", decision,
-                 threshold, "modelName", "modelVersion", "processingTime",
-                 error, "errorCode", "createdAt")
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
-                ''',
-                result_id,
-                session['id'],
-                match_result['id_face_detected'],
-                match_result['selfie_face_detected'],
-                match_result['id_face_count'],
-                match_result['selfie_face_count'],
-                match_result['similarity_score'],
-                match_result['decision'],
-                match_result['threshold'],
-                'insightface',
-                'buffalo_l',
-                match_result['processing_time'],
-                match_result.get('error'),
-                match_result['decision'] if match_result.get('error') else None,
-                datetime.utcnow()
-            )
-            
-            # Update session with face match score
-            if match_result['decision'] == 'MATCH':
-                face_match_score = match_result['similarity_score'] * 100
+        with DB_INSERT_SECONDS.time():
+            async with service.db_pool.acquire() as conn:
+                # id and createdAt are generated by Postgres
                 await conn.execute(
                     '''
-                    UPDATE "ekyc_sessions"
-                    SET "faceMatchScore" = $1, "updatedAt" = $2
-                    WHERE id = $3
+                    INSERT INTO "face_match_results"
+                    (id, "sessionId", "idFaceDetected", "selfieFaceDetected", 
+                     "idFaceCount", "selfieFaceCount", "similarityScore", decision,
+                     threshold, "modelName", "modelVersion", "processingTime",
+                     error, "errorCode", "createdAt")
+                    VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, NOW())
                     ''',
-                    face_match_score,
-                    datetime.utcnow(),
-                    session['id']
+                    db_session_id,
+                    match_result['id_face_detected'],
+                    match_result['selfie_face_detected'],
+                    match_result['id_face_count'],
+                    match_result['selfie_face_count'],
+                    match_result['similarity_score'],
+                    match_result['decision'],
+                    match_result['threshold'],
+                    'insightface',
+                    'buffalo_l',
+                    match_result['processing_time'],
+                    match_result.get('error'),
+                    match_result['decision'] if match_result.get('error') else None
                 )
-                logger.info(f"[FACE-MATCH] Updated session with score: {face_match_score:.2f}")
+            
+                # Update session with face match score
+                if match_result['decision'] == 'MATCH':
+                    face_match_score = match_result['similarity_score'] * 100
+                    await conn.execute(
+                        '''
+                        UPDATE "ekyc_sessions"
+                        SET "faceMatchScore" = $1, "updatedAt" = NOW()
+                        WHERE id = $2
+                        ''',
+                        face_match_score,
+                        db_session_id
+                    )
+                    logger.info(f"[FACE-MATCH] Updated session with score: {face_match_score:.2f}")
         
         # Return error if face matching failed
         if match_result['decision'] != 'MATCH':
@@ -615,7 +630,7 @@ async def match_faces(
         )
 
 
-@router.post("/run", response_model=EkycSessionResponse)
+@router.post("/run", response_model=None, responses={200: {"model": EkycSessionResponse}})
 async def run_ekyc_verification(
     request: EkycRunRequest
 ):
@@ -633,12 +648,11 @@ async def run_ekyc_verification(
     - Final decision (APPROVED/REJECTED/REVIEW_REQUIRED)
     """
     try:
-        db_pool = get_db_pool()
-        service = EkycService(db_pool)
+        service = _service()
         
-        # Verify session exists
-        session = await service.get_session(request.session_id)
-        if not session:
+        # Verify session exists, fetching only its internal id
+        db_session_id = await service.get_session_id(request.session_id)
+        if not db_session_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Session not found"
@@ -646,29 +660,12 @@ async def run_ekyc_verification(
         
         logger.info(f"[EKYC] Running verification for session: {request.session_id}")
         
-        result = await service.run_verification(session['id'])
-        
-        # Ensure proper field mapping for response
-        response_data = {
-            "id": result.get("id"),
-            "user_id": result.get("userId"),
-            "session_id": result.get("sessionId"),
-            "status": result.get("status"),
-            "decision": result.get("decision"),
-            "document_score": result.get("documentScore"),
-            "face_match_score": result.get("faceMatchScore"),
-            "liveness_score": result.get("livenessScore"),
-            "overall_score": result.get("overallScore"),
-            "rejection_reason": result.get("rejectionReason"),
-            "review_notes": result.get("reviewNotes"),
-            "created_at": result.get("createdAt"),
-            "updated_at": result.get("updatedAt"),
-            "completed_at": result.get("completedAt"),
-            "documents": result.get("documents", []),
-            "results": result.get("results", [])
-        }
+        result = await service.run_verification(db_session_id)
+        
+        # The row's columns are already typed, so the response skips re-validation
+        response_data = EkycSessionResponse.from_row(result)
         
-        logger.info(f"[EKYC] Response scores: doc={response_data['document_score']}, face={response_data['face_match_score']}, liveness={response_data['liveness_score']}, overall={response_data['overall_score']}")
+        logger.info(f"[EKYC] Response scores: doc={response_data.document_score}, face={response_data.face_match_score}, liveness={response_data.liveness_score}, overall={response_data.overall_score}")
         
         return response_data
         
@@ -682,7 +679,7 @@ async def run_ekyc_verification(
         )
 
 
-@router.get("/{session_id}", response_model=EkycSessionResponse)
+@router.get("/{session_id}", response_model=None, responses={200: {"model": EkycSessionResponse}})
 async def get_ekyc_session(
     session_id: str
 ):
@@ -695,8 +692,7 @@ async def get_ekyc_session(
     Returns session with all documents and verification results.
     """
     try:
-        db_pool = get_db_pool()
-        service = EkycService(db_pool)
+        service = _service()
         
         session = await service.get_session(session_id)
         
@@ -706,25 +702,8 @@ async def get_ekyc_session(
                 detail="Session not found"
             )
         
-        # Ensure proper field mapping for response
-        response_data = {
-            "id": session.get("id"),
-            "user_id": session.get("userId"),
-            "session_id": session.get("sessionId"),
-            "status": session.get("status"),
-            "decision": session.get("decision"),
-            "document_score": session.get("documentScore"),
-            "face_match_score": session.get("faceMatchScore"),
-            "liveness_score": session.get("livenessScore"),
-            "overall_score": session.get("overallScore"),
-            "rejection_reason": session.get("rejectionReason"),
-            "review_notes": session.get("reviewNotes"),
-            "created_at": session.get("createdAt"),
-            "updated_at": session.get("updatedAt"),
-            "completed_at": session.get("completedAt"),
-            "documents": session.get("documents", []),
-            "results": session.get("results", [])
-        }
+        # The row's columns are already typed, so the response skips re-validation
+        response_data = EkycSessionResponse.from_row(session)
         
         return response_data
         
@@ -738,10 +717,11 @@ async def get_ekyc_session(
         )
 
 
-@router.get("/history/my", response_model=EkycSessionHistoryResponse)
+@router.get("/history/my", response_model=None, responses={200: {"model": EkycSessionHistoryResponse}})
 async def get_my_ekyc_history(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -750,30 +730,53 @@ async def get_my_ekyc_history(
     - **Requires**: JWT authentication
     - **page**: Page number (default: 1)
     - **page_size**: Items per page (default: 20, max: 100)
+    - **cursor**: Keyset cursor; when given, `page` is ignored and no total is computed
     
     Returns paginated list of user's e-KYC sessions.
     """
     try:
-        db_pool = get_db_pool()
-        service = EkycService(db_pool)
-        
-        skip = (page - 1) * page_size
+        service = _service()
         
-        sessions = await service.get_user_sessions(
-            user_id=current_user["id"],
-            skip=skip,
-            take=page_size,
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+            
+            sessions = await service.get_user_sessions_after(
+                user_id=current_user["id"],
+                cursor=position,
+                take=page_size,
+            )
+            total = None
+        else:
+            skip = (page - 1) * page_size
+            
+            sessions = await service.get_user_sessions(
+                user_id=current_user["id"],
+                skip=skip,
+                take=page_size,
+            )
+            
+            total = await service.count_user_sessions(current_user["id"])
+        
+        # Rows are serialized straight to JSON; the schema only documents the shape
+        return ekyc_history_response(
+            sessions,
+            total=total,
+            page=page,
+            page_size=page_size,
+            next_cursor=(
+                encode_cursor(sessions[-1]["createdAt"], sessions[-1]["id"])
+                if len(sessions) == page_size else None
+            ),
         )
         
-        total = await service.count_user_sessions(current_user["id"])
-        
-        return {
-            "sessions": sessions,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[EKYC] Failed to fetch history: {str(e)}")
         raise HTTPException(
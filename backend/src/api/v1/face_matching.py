@@ -5,75 +5,196 @@ RESTful endpoints for facial recognition and biometric verification.
 Provides face matching with liveness detection capabilities.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any, Optional, List
 from datetime import datetime
+import asyncio
 
-from src.schemas.feature import FaceMatchingRequest, FeatureRunResponse
+# SIMD base64 when available, same API as the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+from src.schemas.feature import FaceMatchingRequest, FaceMatchingBatchRequest, FeatureRunResponse
 from src.services.face_matching_service import FaceMatchingService
 from src.utils.auth import get_current_active_user
+from src.utils.responses import feature_result_response
+from src.utils.cache import ResultCache, image_key
+from src.utils.executor import CPU_POOL
+from src.utils.uploads import check_content_length, is_allowed_image, read_upload
 from src.config.prisma import prisma
 
-router = APIRouter(prefix="/face-matching", tags=["Face Matching"])
+router = APIRouter(prefix="/face-matching", tags=["Face Matching"], default_response_class=ORJSONResponse)
 service = FaceMatchingService()
 
-@router.post("/run", response_model=FeatureRunResponse)
+# Per-image upload limit
+_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+# Results for recently matched image pairs, keyed by content hash
+_RESULT_CACHE = ResultCache()
+
+
+async def _match(id_image: bytes, selfie_image: bytes, key: Optional[str] = None) -> Dict[str, Any]:
+    """Run face matching in the CPU thread pool, reusing cached results"""
+    key = key or image_key(id_image, selfie_image)
+    cached = _RESULT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(CPU_POOL, service.match_faces, id_image, selfie_image)
+    if not result.get("error"):
+        _RESULT_CACHE.put(key, result)
+    return result
+
+
+def _decode_base64_image(image_data: str) -> bytes:
+    """Decode a base64 image payload, stripping any data URL prefix"""
+    if image_data.startswith('data:image'):
+        image_data = image_data.split(',')[1]
+    return base64.b64decode(image_data, validate=False)
+
+
+async def _match_encoded(document_image: str, selfie_image: str) -> Dict[str, Any]:
+    """Decode and match one base64 pair, reporting undecodable payloads as a failed match"""
+    try:
+        id_image = _decode_base64_image(document_image)
+        selfie = _decode_base64_image(selfie_image)
+    except (ValueError, IndexError) as e:
+        # binascii.Error is a ValueError; IndexError covers a data URL with no payload
+        return {
+            "decision": service.DECISION_ERROR,
+            "similarity_score": 0.0,
+            "error": f"Invalid base64 image: {e}"
+        }
+    return await _match(id_image, selfie)
+
+
+async def _run_and_store(
+    id_image: bytes,
+    selfie_image: bytes,
+    user_id: str,
+    document_path: str,
+    selfie_path: str,
+    document_hash: Optional[str] = None
+) -> FeatureRunResponse:
+    """Match a document/selfie pair and persist it as a verification session
+    
+    document_hash, when given, is the pair's content hash; it keys the result
+    cache and is stored on the session for upload dedup.
+    """
+    match_result = await _match(id_image, selfie_image, key=document_hash)
+    
+    # match_faces always sets "error"; it is None on success
+    if match_result.get("error"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Face matching failed: {match_result['error']}"
+        )
+    
+    # Similarity is 0.0-1.0; sessions and responses carry a 0-100 score
+    face_match_score = round(match_result["similarity_score"] * 100, 2)
+    
+    # Create or update verification session
+    session = await prisma.verificationSession.create_with_feature_result(
+        {
+            "userId": user_id,
+            "documentPath": document_path,
+            "selfiePath": selfie_path,
+            "documentHash": document_hash,
+            "faceMatchScore": face_match_score
+        },
+        {
+            "featureName": "face_matching",
+            "score": face_match_score,
+            "metadata": match_result
+        }
+    )
+    
+    return FeatureRunResponse(
+        session_id=session["id"],
+        feature_name="face_matching",
+        score=face_match_score,
+        metadata=match_result,
+        processing_time_ms=match_result.get("processing_time"),
+        status="completed",
+        created_at=session["createdAt"]
+    )
+
+@router.post("/run", response_model=FeatureRunResponse, deprecated=True)
 async def run_face_matching(
     face_request: FaceMatchingRequest,
-    enable_liveness: bool = True,
     current_user: dict = Depends(get_current_active_user)
 ):
     """
     Run face matching between document and selfie images.
     
+    Deprecated: use `/run-binary`, which takes the images as multipart
+    files and avoids the base64 size and decoding overhead.
+    
     - **document_image**: Base64 encoded document photo
     - **selfie_image**: Base64 encoded selfie/live capture
-    - **enable_liveness**: Whether to perform liveness detection
     
     Returns detailed face matching results including:
     - Match score (0-100)
-    - Liveness detection results
-    - Biometric quality assessment
-    - Anti-spoofing analysis
+    - Match decision and threshold
+    - Per-image face detection results
     """
     try:
-        # Run face matching analysis
-        match_result = service.match_faces(
-            face_request.document_image,
-            face_request.selfie_image,
-            enable_liveness
+        # Decode payloads once and run face matching on the raw bytes
+        return await _run_and_store(
+            _decode_base64_image(face_request.document_image),
+            _decode_base64_image(face_request.selfie_image),
+            current_user["id"],
+            "base64_document",
+            "base64_selfie"
         )
         
-        if "error" in match_result:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Face matching failed: {match_result['error']}"
-            )
-        
-        # Create or update verification session
-        session = await prisma.verificationsession.create({
-            "userId": current_user["id"],
-            "documentPath": "base64_document",
-            "selfiePath": "base64_selfie",
-            "faceMatchScore": match_result["face_match_score"]
-        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.post("/run-binary", response_model=FeatureRunResponse)
+async def run_face_matching_binary(
+    request: Request,
+    document_file: UploadFile = File(..., description="Document image with face"),
+    selfie_file: UploadFile = File(..., description="Selfie/live capture image"),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Run face matching on document and selfie images sent as multipart files.
+    
+    - **document_file**: Document image file containing face
+    - **selfie_file**: Selfie or live capture image file
+    
+    Returns the same response as `/run` without base64 encoding.
+    """
+    try:
+        for file in (document_file, selfie_file):
+            if not is_allowed_image(file):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File {file.filename} must be an image"
+                )
         
-        # Store feature result
-        await prisma.featureresult.create({
-            "sessionId": session.id,
-            "featureName": "face_matching",
-            "score": match_result["face_match_score"],
-            "metadata": match_result
-        })
+        check_content_length(request, 2 * _MAX_IMAGE_BYTES)
+        doc_content, selfie_content = await asyncio.gather(
+            read_upload(document_file, _MAX_IMAGE_BYTES),
+            read_upload(selfie_file, _MAX_IMAGE_BYTES)
+        )
         
-        return FeatureRunResponse(
-            session_id=session.id,
-            feature_name="face_matching",
-            score=match_result["face_match_score"],
-            metadata=match_result,
-            processing_time_ms=match_result.get("processing_time_ms"),
-            status="completed",
-            created_at=session.createdAt
+        return await _run_and_store(
+            doc_content,
+            selfie_content,
+            current_user["id"],
+            document_file.filename,
+            selfie_file.filename
         )
         
     except HTTPException:
@@ -84,6 +205,39 @@ async def run_face_matching(
             detail=f"Internal server error: {str(e)}"
         )
 
+@router.post("/run-batch", response_model=Dict[str, Any])
+async def run_face_matching_batch(
+    batch_request: FaceMatchingBatchRequest,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Run face matching for several document/selfie pairs in one request.
+    
+    - **pairs**: Up to 8 base64 encoded document/selfie pairs
+    
+    Pairs are matched concurrently on the CPU thread pool. Results are
+    returned in request order and are not stored as verification sessions;
+    a pair whose images cannot be decoded is reported with an error result.
+    """
+    try:
+        results = await asyncio.gather(*(
+            _match_encoded(pair.document_image, pair.selfie_image)
+            for pair in batch_request.pairs
+        ))
+        
+        return {
+            "results": results,
+            "count": len(results),
+            "timestamp": datetime.utcnow().isoformat(),
+            "status": "completed"
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
 @router.get("/{session_id}", response_model=FeatureRunResponse)
 async def get_face_matching_result(
     session_id: str,
@@ -97,17 +251,9 @@ async def get_face_matching_result(
     Returns stored face matching analysis including match scores and liveness results.
     """
     try:
-        feature_result = await prisma.featureresult.find_first(
-            where={
-                "sessionId": session_id,
-                "featureName": "face_matching",
-                "session": {
-                    "userId": current_user["id"]
-                }
-            },
-            include={
-                "session": True
-            }
+        # Ownership is enforced by joining on the session's userId
+        feature_result = await prisma.featureResult.find_for_user(
+            session_id, "face_matching", current_user["id"], decode_metadata=False
         )
         
         if not feature_result:
@@ -116,14 +262,8 @@ async def get_face_matching_result(
                 detail="Face matching result not found for this session"
             )
         
-        return FeatureRunResponse(
-            session_id=feature_result.sessionId,
-            feature_name=feature_result.featureName,
-            score=feature_result.score,
-            metadata=feature_result.metadata,
-            status="completed",
-            created_at=feature_result.createdAt
-        )
+        # Stored metadata JSON is passed through without decoding
+        return feature_result_response(feature_result)
         
     except HTTPException:
         raise
@@ -135,9 +275,9 @@ async def get_face_matching_result(
 
 @router.post("/upload", response_model=Dict[str, Any])
 async def upload_face_images(
+    request: Request,
     document_file: UploadFile = File(..., description="Document image with face"),
     selfie_file: UploadFile = File(..., description="Selfie/live capture image"),
-    enable_liveness: bool = Form(True, description="Enable liveness detection"),
     current_user: dict = Depends(get_current_active_user)
 ):
     """
@@ -145,66 +285,55 @@ async def upload_face_images(
     
     - **document_file**: Document image file containing face
     - **selfie_file**: Selfie or live capture image file
-    - **enable_liveness**: Whether to perform liveness detection
     
     Returns face matching analysis results.
     """
     try:
         # Validate both files
         for file in [document_file, selfie_file]:
-            if not file.content_type.startswith("image/"):
+            if not is_allowed_image(file):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"File {file.filename} must be an image"
                 )
         
-        # Read and convert files to base64
-        import base64
-        
-        doc_content = await document_file.read()
-        selfie_content = await selfie_file.read()
-        
-        # Validate file sizes (max 5MB each)
-        for content, filename in [(doc_content, document_file.filename), 
-                                (selfie_content, selfie_file.filename)]:
-            if len(content) > 5 * 1024 * 1024:  # 5MB
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File {filename} too large. Maximum 5MB allowed"
-                )
-        
-        doc_base64 = base64.b64encode(doc_content).decode('utf-8')
-        selfie_base64 = base64.b64encode(selfie_content).decode('utf-8')
-        
-        # Run face matching
-        match_result = service.match_faces(doc_base64, selfie_base64, enable_liveness)
+        # Reject oversized bodies up front, then read each file (max 5MB each)
+        check_content_length(request, 2 * _MAX_IMAGE_BYTES)
+        doc_content, selfie_content = await asyncio.gather(
+            read_upload(document_file, _MAX_IMAGE_BYTES),
+            read_upload(selfie_file, _MAX_IMAGE_BYTES)
+        )
         
-        if "error" in match_result:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Face matching failed: {match_result['error']}"
-            )
+        # Fingerprint the pair once for the result cache and upload dedup
+        digest = image_key(doc_content, selfie_content)
         
-        # Create session and store results
-        session = await prisma.verificationsession.create({
-            "userId": current_user["id"],
-            "documentPath": document_file.filename,
-            "selfiePath": selfie_file.filename,
-            "faceMatchScore": match_result["face_match_score"]
-        })
+        existing = await prisma.verificationSession.find_by_document_hash(
+            current_user["id"], digest, "face_matching"
+        )
+        if existing:
+            return {
+                "session_id": existing["id"],
+                "document_file": document_file.filename,
+                "selfie_file": selfie_file.filename,
+                "analysis_result": existing["metadata"],
+                "status": "completed"
+            }
         
-        await prisma.featureresult.create({
-            "sessionId": session.id,
-            "featureName": "face_matching",
-            "score": match_result["face_match_score"],
-            "metadata": match_result
-        })
+        # Match, store and cache the pair the same way as /run-binary
+        run = await _run_and_store(
+            doc_content,
+            selfie_content,
+            current_user["id"],
+            document_file.filename,
+            selfie_file.filename,
+            document_hash=digest
+        )
         
         return {
-            "session_id": session.id,
+            "session_id": run.session_id,
             "document_file": document_file.filename,
             "selfie_file": selfie_file.filename,
-            "analysis_result": match_result,
+            "analysis_result": run.metadata,
             "status": "completed"
         }
         
@@ -229,21 +358,17 @@ async def run_liveness_detection_only(
     Returns liveness detection results without face matching.
     """
     try:
-        # Decode image for liveness detection
-        import base64
-        import io
-        import numpy as np
-        from PIL import Image
+        loop = asyncio.get_running_loop()
         
-        if selfie_image.startswith('data:image'):
-            selfie_image = selfie_image.split(',')[1]
-        
-        image_bytes = base64.b64decode(selfie_image)
-        image = Image.open(io.BytesIO(image_bytes))
-        image_array = np.array(image)
+        # Decode straight to a BGR array with OpenCV, off the event loop
+        image_array = await loop.run_in_executor(
+            CPU_POOL, service._load_image, _decode_base64_image(selfie_image)
+        )
+        if image_array is None:
+            raise ValueError("Could not decode selfie image")
         
-        # Run liveness detection
-        liveness_result = service._detect_liveness(image_array)
+        # Run liveness detection in the CPU thread pool
+        liveness_result = await loop.run_in_executor(CPU_POOL, service._detect_liveness, image_array)
         
         return {
             "liveness_result": liveness_result,
@@ -5,28 +5,53 @@ RESTful endpoints for document authenticity verification.
 Provides document analysis and fraud detection capabilities.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
+from fastapi.responses import ORJSONResponse
 from typing import Dict, Any, Optional
 from datetime import datetime
+import asyncio
 import logging
 import traceback
-import base64
 import uuid
 
 from src.schemas.feature import DocumentUpload, FeatureRunResponse
 from src.schemas.session import VerificationSessionResponse
 from src.services.fake_document_service import FakeDocumentService
 from src.utils.auth import get_current_active_user
+from src.utils.responses import feature_result_response
+from src.utils.cache import ResultCache, image_key
+from src.utils.executor import CPU_POOL
+from src.utils.uploads import check_content_length, is_allowed_image, read_upload
 from src.config.prisma import prisma
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-router = APIRouter(prefix="/fake-document", tags=["Fake Document Detection"])
+router = APIRouter(prefix="/fake-document", tags=["Fake Document Detection"], default_response_class=ORJSONResponse)
 service = FakeDocumentService()
 
+# Document upload limit
+_MAX_DOCUMENT_BYTES = 10 * 1024 * 1024
+
+# Results for recently analyzed images, keyed by content hash
+_RESULT_CACHE = ResultCache()
+
+
+async def _analyze(document_image, document_type: Optional[str]) -> Dict[str, Any]:
+    """Run document analysis in the CPU thread pool, reusing cached results"""
+    key = image_key(document_image, document_type)
+    cached = _RESULT_CACHE.get(key)
+    if cached is not None:
+        logger.info("[FORGERY] Cache hit, returning stored analysis")
+        return cached
+    
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(CPU_POOL, service.analyze_document, document_image, document_type)
+    if "error" not in result:
+        _RESULT_CACHE.put(key, result)
+    return result
+
 @router.post("/run", response_model=FeatureRunResponse)
 async def run_fake_document_detection(
     document_upload: DocumentUpload,
@@ -46,7 +71,7 @@ async def run_fake_document_detection(
     """
     try:
         # Run document analysis
-        analysis_result = service.analyze_document(
+        analysis_result = await _analyze(
             document_upload.document_image,
             document_upload.document_type
         )
@@ -58,28 +83,27 @@ async def run_fake_document_detection(
             )
         
         # Create or update verification session
-        session = await prisma.verificationsession.create({
-            "userId": current_user["id"],
-            "documentPath": "base64_document",  # In production, store file reference
-            "forgeryScore": analysis_result["forgery_score"]
-        })
-        
-        # Store feature result
-        await prisma.featureresult.create({
-            "sessionId": session.id,
-            "featureName": "fake_document",
-            "score": analysis_result["forgery_score"],
-            "metadata": analysis_result
-        })
+        session = await prisma.verificationSession.create_with_feature_result(
+            {
+                "userId": current_user["id"],
+                "documentPath": "base64_document",  # In production, store file reference
+                "forgeryScore": analysis_result["forgery_score"]
+            },
+            {
+                "featureName": "fake_document",
+                "score": analysis_result["forgery_score"],
+                "metadata": analysis_result
+            }
+        )
         
         return FeatureRunResponse(
-            session_id=session.id,
+            session_id=session["id"],
             feature_name="fake_document",
             score=analysis_result["forgery_score"],
             metadata=analysis_result,
             processing_time_ms=analysis_result.get("processing_time_ms"),
             status="completed",
-            created_at=session.createdAt
+            created_at=session["createdAt"]
         )
         
     except Exception as e:
@@ -102,17 +126,9 @@ async def get_fake_document_result(
     """
     try:
         # Find the feature result
-        feature_result = await prisma.featureresult.find_first(
-            where={
-                "sessionId": session_id,
-                "featureName": "fake_document",
-                "session": {
-                    "userId": current_user["id"]  # Ensure user owns this session
-                }
-            },
-            include={
-                "session": True
-            }
+        # Ownership is enforced by joining on the session's userId
+        feature_result = await prisma.featureResult.find_for_user(
+            session_id, "fake_document", current_user["id"], decode_metadata=False
         )
         
         if not feature_result:
@@ -121,14 +137,8 @@ async def get_fake_document_result(
                 detail="Fake document result not found for this session"
             )
         
-        return FeatureRunResponse(
-            session_id=feature_result.sessionId,
-            feature_name=feature_result.featureName,
-            score=feature_result.score,
-            metadata=feature_result.metadata,
-            status="completed",
-            created_at=feature_result.createdAt
-        )
+        # Stored metadata JSON is passed through without decoding
+        return feature_result_response(feature_result)
         
     except HTTPException:
         raise
@@ -140,6 +150,7 @@ async def get_fake_document_result(
 
 @router.post("/upload")
 async def upload_document_file(
+    request: Request,
     file: UploadFile = File(...),
     document_type: Optional[str] = None
 ):
@@ -157,44 +168,31 @@ async def upload_document_file(
         logger.info(f"[UPLOAD] File received: {file.filename} ({file.content_type})")
         
         # Validate file type
-        if not file.content_type or not file.content_type.startswith("image/"):
+        if not is_allowed_image(file):
             logger.warning(f"[UPLOAD] Invalid file type: {file.content_type}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
-                    "error": "Only image files are supported (JPEG, PNG, BMP, TIFF)"
+                    "error": "Only image files are supported (JPEG, PNG, BMP, TIFF, WEBP)"
                 }
             )
         
-        # Validate file size (max 10MB)
-        content = await file.read()
+        # Validate file size (max 10MB) without buffering oversized bodies
+        check_content_length(request, _MAX_DOCUMENT_BYTES)
+        content = await read_upload(file, _MAX_DOCUMENT_BYTES)
         file_size_mb = len(content) / (1024 * 1024)
         logger.info(f"[UPLOAD] File size: {file_size_mb:.2f} MB")
         
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            logger.warning(f"[UPLOAD] File too large: {file_size_mb:.2f} MB")
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "success": False,
-                    "error": f"File size ({file_size_mb:.2f} MB) exceeds maximum allowed (10 MB)"
-                }
-            )
-        
-        logger.info(f"[PREPROCESS] Converting image to base64...")
-        # Convert to base64 for processing
-        base64_content = base64.b64encode(content).decode('utf-8')
-        
         logger.info(f"[OCR] Starting text extraction...")
         logger.info(f"[FORGERY] Analyzing document for tampering...")
         
-        # Run analysis
-        analysis_result = service.analyze_document(base64_content, document_type)
+        # Run analysis on the raw upload bytes
+        analysis_result = await _analyze(content, document_type)
         
         if "error" in analysis_result:
             logger.error(f"[FORGERY] Analysis failed: {analysis_result['error']}")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={
                     "success": False,
@@ -209,9 +207,10 @@ async def upload_document_file(
         
         logger.info(f"[DONE] Response sent - Processing time: {analysis_result.get('processing_time_ms', 0)} ms")
         
-        # Build issues list (filter out None values)
+        # Build issues list from only the checks that failed
+        tampering_detected = analysis_result.get("tampering_detected", False)
         issues = []
-        if analysis_result.get("tampering_detected"):
+        if tampering_detected:
             issues.append("Tampering detected")
         if not analysis_result.get("hologram_valid"):
             issues.append("Hologram invalid")
@@ -219,7 +218,7 @@ async def upload_document_file(
             issues.append("OCR inconsistent")
         
         # Return structured response
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=200,
             content={
                 "success": True,
@@ -230,7 +229,7 @@ async def upload_document_file(
                 "isAuthentic": analysis_result.get("is_authentic", False),
                 "issues": issues,
                 "metadata": {
-                    "tamperingDetected": analysis_result.get("tampering_detected", False),
+                    "tamperingDetected": tampering_detected,
                     "ocrExtracted": analysis_result.get("ocr_validation", {}),
                     "securityFeatures": analysis_result.get("security_features", {}).get("features_detected", {})
                 }
@@ -239,7 +238,7 @@ async def upload_document_file(
         
     except HTTPException as he:
         logger.error(f"[ERROR] HTTP Exception: {str(he)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=he.status_code,
             content={
                 "success": False,
@@ -249,7 +248,7 @@ async def upload_document_file(
     except Exception as e:
         logger.error(f"[ERROR] Unexpected error: {str(e)}")
         logger.error(traceback.format_exc())
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -293,10 +292,10 @@ async def health_check():
             "version": service.model_version
         }
         logger.info("[HEALTH] Health check passed")
-        return JSONResponse(status_code=200, content=model_info)
+        return ORJSONResponse(status_code=200, content=model_info)
     except Exception as e:
         logger.error(f"[HEALTH] Health check failed: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
@@ -6,18 +6,54 @@ Aggregates multiple verification results to calculate overall risk scores.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
+import asyncio
+import orjson
 
 from src.schemas.feature import RiskScoringRequest, FeatureRunResponse
 from src.schemas.session import VerificationSessionResponse, SessionStatsResponse
 from src.services.risk_engine import RiskEngine, RiskLevel, DecisionRecommendation
 from src.utils.auth import get_current_active_user, require_admin
+from src.utils.responses import feature_result_response
 from src.config.prisma import prisma
 
 router = APIRouter(prefix="/risk-scoring", tags=["Risk Scoring"])
 risk_engine = RiskEngine()
 
+# Service info is static for the process lifetime, so it is serialized once
+_SERVICE_INFO_BODY = orjson.dumps({
+    "service_name": "Risk Scoring Engine",
+    **risk_engine.get_model_info(),
+    "capabilities": [
+        "Comprehensive risk assessment",
+        "Multi-factor analysis",
+        "ML-based risk calculation",
+        "Behavioral pattern detection",
+        "Geolocation risk analysis",
+        "Device fingerprinting",
+        "Historical data integration"
+    ],
+    "assessment_factors": [
+        "Document authenticity score",
+        "Face matching confidence",
+        "Deepfake detection results",
+        "Behavioral anomalies",
+        "Geolocation consistency",
+        "Device reputation",
+        "Session characteristics"
+    ]
+})
+
+# Static part of the health payload; only the timestamp changes
+_HEALTH_BASE = {
+    "status": "healthy",
+    "service": "risk_scoring",
+    "version": risk_engine.model_version
+}
+
+
 @router.post("/run", response_model=FeatureRunResponse)
 async def run_risk_assessment(
     risk_request: RiskScoringRequest,
@@ -37,13 +73,8 @@ async def run_risk_assessment(
     - Contributing risk factors
     """
     try:
-        # Fetch verification session and related data
-        session = await prisma.verificationsession.find_unique(
-            where={"id": risk_request.session_id},
-            include={
-                "featureResults": True
-            }
-        )
+        # Fetch only the columns the risk engine reads
+        session = await prisma.verificationSession.find_scores(risk_request.session_id)
         
         if not session:
             raise HTTPException(
@@ -52,31 +83,16 @@ async def run_risk_assessment(
             )
         
         # Ensure user owns this session
-        if session.userId != current_user["id"]:
+        if session["userId"] != current_user["id"]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Access denied to this verification session"
             )
         
-        # Prepare session data for risk assessment
-        session_data = {
-            "forgeryScore": session.forgeryScore,
-            "faceMatchScore": session.faceMatchScore,
-            "deepfakeScore": session.deepfakeScore,
-            "createdAt": session.createdAt.isoformat(),
-            "featureResults": [
-                {
-                    "featureName": result.featureName,
-                    "score": result.score,
-                    "metadata": result.metadata
-                }
-                for result in session.featureResults
-            ]
-        }
-        
-        # Run risk assessment
-        risk_assessment = risk_engine.calculate_risk_score(
-            session_data,
+        # Run risk assessment directly on the fetched row, off the event loop
+        risk_assessment = await asyncio.to_thread(
+            risk_engine.calculate_risk_score,
+            session,
             risk_request.additional_data
         )
         
@@ -86,31 +102,22 @@ async def run_risk_assessment(
                 detail=f"Risk assessment failed: {risk_assessment['error']}"
             )
         
-        # Update verification session with risk score
-        updated_session = await prisma.verificationsession.update(
-            where={"id": session.id},
-            data={
-                "riskScore": risk_assessment["risk_score"],
-                "decision": risk_assessment["recommendation"]
-            }
-        )
-        
-        # Store risk assessment result
-        await prisma.featureresult.create({
-            "sessionId": session.id,
-            "featureName": "risk_scoring",
-            "score": risk_assessment["risk_score"],
+        # Update the session and store the result in a single round trip
+        updated_at = await prisma.verificationSession.save_risk_assessment({
+            "sessionId": session["id"],
+            "riskScore": risk_assessment["risk_score"],
+            "decision": getattr(risk_assessment["recommendation"], "value", risk_assessment["recommendation"]),
             "metadata": risk_assessment
         })
         
         return FeatureRunResponse(
-            session_id=session.id,
+            session_id=session["id"],
             feature_name="risk_scoring",
             score=risk_assessment["risk_score"],
             metadata=risk_assessment,
             processing_time_ms=risk_assessment["processing_metadata"]["processing_time_ms"],
             status="completed",
-            created_at=updated_session.updatedAt
+            created_at=updated_at
         )
         
     except HTTPException:
@@ -134,17 +141,9 @@ async def get_risk_assessment_result(
     Returns stored risk assessment including overall score and detailed breakdown.
     """
     try:
-        feature_result = await prisma.featureresult.find_first(
-            where={
-                "sessionId": session_id,
-                "featureName": "risk_scoring",
-                "session": {
-                    "userId": current_user["id"]
-                }
-            },
-            include={
-                "session": True
-            }
+        # Ownership is enforced by joining on the session's userId
+        feature_result = await prisma.featureResult.find_for_user(
+            session_id, "risk_scoring", current_user["id"], decode_metadata=False
         )
         
         if not feature_result:
@@ -153,14 +152,8 @@ async def get_risk_assessment_result(
                 detail="Risk assessment result not found for this session"
             )
         
-        return FeatureRunResponse(
-            session_id=feature_result.sessionId,
-            feature_name=feature_result.featureName,
-            score=feature_result.score,
-            metadata=feature_result.metadata,
-            status="completed",
-            created_at=feature_result.createdAt
-        )
+        # Stored metadata JSON is passed through without decoding
+        return feature_result_response(feature_result)
         
     except HTTPException:
         raise
@@ -185,6 +178,15 @@ async def batch_risk_assessment(
     Returns array of risk assessment results for each session.
     """
     try:
+        # Drop repeated ids, keeping first-seen order, before any I/O
+        session_ids = list(dict.fromkeys(session_ids))
+        
+        if not session_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="At least one session is required for batch assessment"
+            )
+        
         # Limit batch size
         if len(session_ids) > 50:
             raise HTTPException(
@@ -192,78 +194,65 @@ async def batch_risk_assessment(
                 detail="Maximum 50 sessions allowed in batch assessment"
             )
         
+        # One query for every session the user owns in this batch
+        sessions = await prisma.verificationSession.find_many_for_user(
+            session_ids, current_user["id"]
+        )
+        by_id = {session["id"]: session for session in sessions}
+        
+        found = [by_id[session_id] for session_id in session_ids if session_id in by_id]
+        
+        # Score every found session in one vectorized pass, off the event loop
+        scored = await asyncio.to_thread(risk_engine.calculate_risk_score_batch, found, additional_data)
+        assessments = dict(zip((session["id"] for session in found), scored))
+        
         results = []
+        pending = []
         
         for session_id in session_ids:
-            try:
-                # Fetch session
-                session = await prisma.verificationsession.find_unique(
-                    where={"id": session_id},
-                    include={"featureResults": True}
-                )
-                
-                if not session or session.userId != current_user["id"]:
-                    results.append({
-                        "session_id": session_id,
-                        "error": "Session not found or access denied",
-                        "status": "failed"
-                    })
-                    continue
-                
-                # Prepare session data
-                session_data = {
-                    "forgeryScore": session.forgeryScore,
-                    "faceMatchScore": session.faceMatchScore,
-                    "deepfakeScore": session.deepfakeScore,
-                    "createdAt": session.createdAt.isoformat()
-                }
-                
-                # Run risk assessment
-                risk_assessment = risk_engine.calculate_risk_score(
-                    session_data,
-                    additional_data
-                )
-                
-                if "error" in risk_assessment:
-                    results.append({
-                        "session_id": session_id,
-                        "error": risk_assessment["error"],
-                        "status": "failed"
-                    })
-                    continue
-                
-                # Update session
-                await prisma.verificationsession.update(
-                    where={"id": session.id},
-                    data={
-                        "riskScore": risk_assessment["risk_score"],
-                        "decision": risk_assessment["recommendation"]
-                    }
-                )
-                
-                # Store result
-                await prisma.featureresult.create({
-                    "sessionId": session.id,
-                    "featureName": "risk_scoring",
-                    "score": risk_assessment["risk_score"],
-                    "metadata": risk_assessment
-                })
-                
+            risk_assessment = assessments.get(session_id)
+            if risk_assessment is None:
                 results.append({
                     "session_id": session_id,
-                    "risk_score": risk_assessment["risk_score"],
-                    "risk_level": risk_assessment["risk_level"],
-                    "recommendation": risk_assessment["recommendation"],
-                    "confidence": risk_assessment["confidence"],
-                    "status": "completed"
+                    "error": "Session not found or access denied",
+                    "status": "failed"
                 })
-                
-            except Exception as session_error:
+                continue
+            
+            if "error" in risk_assessment:
                 results.append({
                     "session_id": session_id,
-                    "error": str(session_error),
+                    "error": risk_assessment["error"],
                     "status": "failed"
                 })
+                continue
+            
+            pending.append({
+                "sessionId": session_id,
+                "riskScore": risk_assessment["risk_score"],
+                "decision": getattr(risk_assessment["recommendation"], "value", risk_assessment["recommendation"]),
+                "metadata": risk_assessment
+            })
+            results.append({
+                "session_id": session_id,
+                "risk_score": risk_assessment["risk_score"],
+                "risk_level": risk_assessment["risk_level"],
+                "recommendation": risk_assessment["recommendation"],
+                "confidence": risk_assessment["confidence"],
+                "status": "completed"
+            })
+        
+        # Persist every successful assessment together
+        if pending:
+            try:
+                await prisma.verificationSession.save_risk_assessments(pending)
+            except Exception as db_error:
+                saved = {item["sessionId"] for item in pending}
+                results = [
+                    {"session_id": r["session_id"], "error": str(db_error), "status": "failed"}
+                    if r["session_id"] in saved else r
+                    for r in results
+                ]
         
         return results
         
@@ -292,25 +281,19 @@ async def get_risk_dashboard_stats(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Get user's sessions in date range
-        sessions = await prisma.verificationsession.find_many(
-            where={
-                "userId": current_user["id"],
-                "createdAt": {
-                    "gte": start_date,
-                    "lte": end_date
-                }
-            }
+        # Aggregate the user's sessions in date range in Postgres
+        stats = await prisma.verificationSession.stats_for_user(
+            current_user["id"], start_date, end_date
         )
         
         # Calculate statistics
-        total_sessions = len(sessions)
-        completed_sessions = len([s for s in sessions if s.riskScore is not None])
+        total_sessions = stats["total"]
+        completed_sessions = stats["completed"]
         pending_sessions = total_sessions - completed_sessions
         
-        approved_sessions = len([s for s in sessions if s.decision == "APPROVED"])
-        rejected_sessions = len([s for s in sessions if s.decision == "REJECTED"])
-        manual_review_sessions = len([s for s in sessions if s.decision == "MANUAL_REVIEW"])
+        approved_sessions = stats["approved"]
+        rejected_sessions = stats["rejected"]
+        manual_review_sessions = stats["manual_review"]
         
         # Calculate average processing time (simulated)
         avg_processing_time = 4500 if completed_sessions > 0 else None  # 4.5 seconds average
@@ -351,34 +334,19 @@ async def get_risk_distribution(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # Get all sessions with risk scores
-        sessions = await prisma.verificationsession.find_many(
-            where={
-                "createdAt": {
-                    "gte": start_date,
-                    "lte": end_date
-                },
-                "riskScore": {
-                    "not": None
-                }
-            }
+        # Bucket all sessions with risk scores in Postgres
+        distribution = await prisma.verificationSession.risk_distribution(
+            start_date, end_date, risk_engine.risk_level_bounds.tolist()
         )
         
-        # Calculate risk level distribution
-        risk_levels = {"LOW": 0, "MEDIUM": 0, "HIGH": 0, "CRITICAL": 0}
-        
-        for session in sessions:
-            score = session.riskScore
-            if score <= 250:
-                risk_levels["LOW"] += 1
-            elif score <= 500:
-                risk_levels["MEDIUM"] += 1
-            elif score <= 750:
-                risk_levels["HIGH"] += 1
-            else:
-                risk_levels["CRITICAL"] += 1
+        risk_levels = {
+            "LOW": distribution["low"],
+            "MEDIUM": distribution["medium"],
+            "HIGH": distribution["high"],
+            "CRITICAL": distribution["critical"]
+        }
         
-        total_assessed = len(sessions)
+        total_assessed = distribution["total"]
         
         return {
             "period_days": days,
@@ -388,8 +356,8 @@ async def get_risk_distribution(
                 level: round(count / total_assessed * 100, 2) if total_assessed > 0 else 0
                 for level, count in risk_levels.items()
             },
-            "average_risk_score": round(sum(s.riskScore for s in sessions) / total_assessed, 2) if total_assessed > 0 else 0,
-            "generated_at": datetime.utcnow().isoformat()
+            "average_risk_score": round(distribution["average"], 2) if total_assessed > 0 else 0,
+            "generated_at": end_date.isoformat()
         }
         
     except Exception as e:
@@ -405,37 +373,11 @@ async def get_service_info():
     
     Returns model capabilities, thresholds, and scoring methodology.
     """
-    return {
-        "service_name": "Risk Scoring Engine",
-        **risk_engine.get_model_info(),
-        "capabilities": [
-            "Comprehensive risk assessment",
-            "Multi-factor analysis",
-            "ML-based risk calculation",
-            "Behavioral pattern detection",
-            "Geolocation risk analysis",
-            "Device fingerprinting",
-            "Historical data integration"
-        ],
-        "assessment_factors": [
-            "Document authenticity score",
-            "Face matching confidence",
-            "Deepfake detection results",
-            "Behavioral anomalies",
-            "Geolocation consistency",
-            "Device reputation",
-            "Session characteristics"
-        ]
-    }
+    return Response(content=_SERVICE_INFO_BODY, media_type="application/json")
 
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint for service monitoring.
     """
-    return {
-        "status": "healthy",
-        "service": "risk_scoring",
-        "timestamp": datetime.utcnow().isoformat(),
-        "version": risk_engine.model_version
-    }
+    return {**_HEALTH_BASE, "timestamp": datetime.utcnow().isoformat()}
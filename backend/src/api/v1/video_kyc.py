@@ -3,10 +3,14 @@ Video KYC API Routes - Video KYC verification endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import ORJSONResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from typing import Optional
+from functools import lru_cache
 import logging
+import os
 from src.config.prisma import get_db_pool
-from src.utils.auth import get_current_user
+from src.utils.auth import get_current_user, get_current_active_user, optional_security
 from src.schemas.video_kyc import (
     VideoKYCSessionCreate,
     VideoKYCSessionResponse,
@@ -27,69 +31,72 @@ from src.schemas.video_kyc import (
     VideoKYCSessionHistoryResponse,
     VideoKYCIdCaptureResponse,
 )
-from src.services.video_kyc_service import VideoKYCService
-from src.services.ocr_service import OCRService
+from src.services.video_kyc_service import VideoKYCService, MAX_UPLOAD_BYTES
+from src.utils.uploads import UploadBufferPool, check_content_length, is_allowed_image
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.responses import video_kyc_history_response
+from src.services.ocr_service import get_ocr_service
 
 logger = logging.getLogger(__name__)
-router = APIRouter(prefix="/video-kyc", tags=["Video KYC"])
+router = APIRouter(prefix="/video-kyc", tags=["Video KYC"], default_response_class=ORJSONResponse)
+
+# Image slots an upload can fill on a session
+UPLOAD_FILE_TYPES = frozenset({"profile", "signature", "document"})
+
+# Reused read buffers for captured ID frames; a capture waits when all are in use
+_ID_FRAME_BUFFERS = UploadBufferPool(int(os.getenv("ID_CAPTURE_BUFFERS", "4")), MAX_UPLOAD_BYTES)
+
+
+@lru_cache(maxsize=1)
+def _service() -> VideoKYCService:
+    """Shared Video KYC service bound to the application database pool"""
+    return VideoKYCService(get_db_pool())
 
 
 # ============================================
 # Session Management
 # ============================================
 
-@router.post("/session/create", response_model=VideoKYCSessionResponse)
+@router.post("/session/create", response_model=None, responses={200: {"model": VideoKYCSessionResponse}})
 async def create_session(
     request: Request
 ):
     """Create a new Video KYC session (demo mode - no authentication required)"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        ip_address = request.client.host if request.client else None
-        user_agent = request.headers.get("user-agent")
-        
-        # Use demo user ID for anonymous sessions
-        user_id = "demo-user"
-        
-        session = await service.create_session(
-            user_id=user_id,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        
-        return session
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    ip_address = request.client.host if request.client else None
+    user_agent = request.headers.get("user-agent")
+    
+    # Use demo user ID for anonymous sessions
+    user_id = "demo-user"
+    
+    session = await service.create_session(
+        user_id=user_id,
+        ip_address=ip_address,
+        user_agent=user_agent
+    )
+    
+    return VideoKYCSessionResponse.from_row(session)
 
 
-@router.get("/session/{session_id}", response_model=VideoKYCSessionResponse)
+@router.get("/session/{session_id}", response_model=None, responses={200: {"model": VideoKYCSessionResponse}})
 async def get_session(
     session_id: str
 ):
     """Get Video KYC session by ID (demo mode - no authentication required)"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        session = await service.get_session(session_id)
-        
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        return session
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    session = await service.get_session(session_id)
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return VideoKYCSessionResponse.from_row(session)
 
 
-@router.put("/session/{session_id}/update", response_model=VideoKYCSessionResponse)
+@router.put("/session/{session_id}/update", response_model=None, responses={200: {"model": VideoKYCSessionResponse}})
 async def update_session(
     session_id: str,
     update_data: VideoKYCSessionUpdate,
@@ -97,22 +104,14 @@ async def update_session(
 ):
     """Update Video KYC session"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(session_id)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        updated_session = await service.update_session(session_id, update_data)
-        return updated_session
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Ownership is checked by the update itself
+    updated_session = await service.update_session(session_id, update_data, current_user["id"])
+    if not updated_session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return VideoKYCSessionResponse.from_row(updated_session)
 
 
 # ============================================
@@ -126,22 +125,14 @@ async def create_question(
 ):
     """Create a question in Video KYC session"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(question_data.sessionId)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        question = await service.add_question(question_data)
-        return question
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Ownership is checked by the insert itself
+    question = await service.add_question(question_data, current_user["id"])
+    if not question:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return question
 
 
 @router.post("/answer/submit", response_model=VideoKYCAnswerResponse)
@@ -151,22 +142,14 @@ async def submit_answer(
 ):
     """Submit an answer to a Video KYC question"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(answer_data.sessionId)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        answer = await service.add_answer(answer_data)
-        return answer
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Ownership is checked by the insert itself
+    answer = await service.add_answer(answer_data, current_user["id"])
+    if not answer:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return answer
 
 
 # ============================================
@@ -180,97 +163,111 @@ async def add_chat_message(
 ):
     """Add a chat message to Video KYC session"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(message_data.sessionId)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        message = await service.add_chat_message(message_data)
-        return message
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Ownership is checked by the insert itself
+    message = await service.add_chat_message(message_data, current_user["id"])
+    if not message:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return message
 
 
 # ============================================
-# ID Document OCR Capture (Simplified - No Session Required)
+# ID Document OCR Capture (Session Optional)
 # ============================================
 
 @router.post("/capture-id", response_model=VideoKYCIdCaptureResponse)
 async def capture_id_document(
+    request: Request,
     file: UploadFile = File(...),
-    session_id: Optional[str] = Form(None)
+    session_id: Optional[str] = Form(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
 ):
     """
     Capture and process ID document image with OCR
     
     Extracts ID number from document using OCR.
-    Works without authentication or session - just processes the image and returns results.
+    Without a session_id it works unauthenticated and only returns the results.
+    With a session_id the caller must be authenticated and own the session,
+    and the extracted document is saved to it.
     """
     
-    ocr_service = OCRService()
+    ocr_service = get_ocr_service()
     
-    try:
-        logger.info(f"[VIDEO-KYC] ID capture request received")
-        
-        # Validate file is image
-        if not file.content_type or not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
-        
-        file_size = file.size or 0
-        logger.info(f"[VIDEO-KYC] ID frame captured, size: {file_size / 1024:.1f} KB")
-        
-        # Read image data
-        image_data = await file.read()
-        
-        # Process with OCR
+    logger.info("[VIDEO-KYC] ID capture request received")
+    
+    # Saving to a session requires its owner; check the token before any OCR work
+    current_user = None
+    if session_id:
+        if credentials is None:
+            raise HTTPException(
+                status_code=401,
+                detail="Authentication required to save to a session",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        current_user = await get_current_active_user(await get_current_user(credentials))
+    
+    # Reject oversized bodies and non-image uploads before reading the frame
+    check_content_length(request, MAX_UPLOAD_BYTES)
+    
+    if not is_allowed_image(file):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("[VIDEO-KYC] ID frame captured, size: %.1f KB", (file.size or 0) / 1024)
+    
+    # Read the frame into a pooled buffer, bounded by the upload limit, and OCR it in place
+    async with _ID_FRAME_BUFFERS.read(file) as image_data:
         logger.info("[VIDEO-KYC OCR] Running OCR on ID document...")
         ocr_result = await ocr_service.process_id_document(image_data)
-        
-        if not ocr_result['success']:
-            logger.warning(f"[VIDEO-KYC OCR] Failed: {ocr_result.get('error', 'Unknown error')}")
-            return VideoKYCIdCaptureResponse(
-                success=False,
-                error=ocr_result.get('error', 'OCR processing failed'),
-                processing_time=ocr_result.get('processing_time'),
-                quality_score=ocr_result.get('quality_score'),
-                message="Please ensure ID is clear, well-lit, and inside the frame"
-            )
-        
-        # Extract data
-        id_number = ocr_result['idNumber']
-        id_type = ocr_result.get('idType', 'unknown')
-        confidence = ocr_result['confidence']
-        full_text = ocr_result.get('fullText', '')
-        processing_time = ocr_result.get('processing_time', 0)
-        
-        logger.info(f"[VIDEO-KYC OCR] ✓ Extracted ID: {id_number}")
-        logger.info(f"[VIDEO-KYC OCR]   Type: {id_type}, Confidence: {confidence:.1%}")
-        logger.info(f"[VIDEO-KYC OCR]   Processing time: {processing_time}ms")
-        
+    
+    if not ocr_result['success']:
+        logger.warning("[VIDEO-KYC OCR] Failed: %s", ocr_result.get('error', 'Unknown error'))
         return VideoKYCIdCaptureResponse(
-            success=True,
-            idNumber=id_number,
-            idType=id_type,
-            confidence=round(confidence, 3),
-            fullText=full_text,
-            processing_time=processing_time,
+            success=False,
+            error=ocr_result.get('error', 'OCR processing failed'),
+            processing_time=ocr_result.get('processing_time'),
             quality_score=ocr_result.get('quality_score'),
-            message=f"ID extracted successfully: {id_number}"
+            message="Please ensure ID is clear, well-lit, and inside the frame"
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"[VIDEO-KYC] ID capture failed: {str(e)}")
-        logger.exception(e)  # Log full traceback
-        raise HTTPException(status_code=500, detail=f"ID capture error: {str(e)}")
+    
+    # Extract data
+    id_number = ocr_result['idNumber']
+    id_type = ocr_result.get('idType', 'unknown')
+    confidence = ocr_result['confidence']
+    full_text = ocr_result.get('fullText', '')
+    processing_time = ocr_result.get('processing_time', 0)
+    
+    logger.info(
+        "[VIDEO-KYC OCR] ✓ Extracted ID: %s (type: %s, confidence: %.1f%%, processing time: %sms)",
+        id_number, id_type, confidence * 100, processing_time
+    )
+    
+    # Persist against the session only after OCR, so no connection is held during it
+    if session_id:
+        # Ownership is checked by the insert itself
+        document_id = await _service().save_id_document(
+            session_id=session_id,
+            id_number=id_number,
+            full_text=full_text,
+            ocr_json=ocr_result,
+            confidence=confidence,
+            user_id=current_user["id"]
+        )
+        if not document_id:
+            raise HTTPException(status_code=404, detail="Session not found")
+    
+    return VideoKYCIdCaptureResponse(
+        success=True,
+        idNumber=id_number,
+        idType=id_type,
+        confidence=round(confidence, 3),
+        fullText=full_text,
+        processing_time=processing_time,
+        quality_score=ocr_result.get('quality_score'),
+        message=f"ID extracted successfully: {id_number}"
+    )
 
 
 # ============================================
@@ -279,6 +276,7 @@ async def capture_id_document(
 
 @router.post("/upload", response_model=VideoKYCFileUploadResponse)
 async def upload_file(
+    request: Request,
     file: UploadFile = File(...),
     session_id: str = Form(...),
     file_type: str = Form(...),
@@ -288,42 +286,36 @@ async def upload_file(
 ):
     """Upload image file for Video KYC session"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(session_id)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        # Validate file type
-        if file_type not in ["profile", "signature", "document"]:
-            raise HTTPException(status_code=400, detail="Invalid file type")
-        
-        # Read file data
-        file_data = await file.read()
-        
-        # Save file
-        file_path = await service.save_uploaded_file(
-            session_id=session_id,
-            file_data=file_data,
-            file_type=file_type,
-            filename=file.filename or "image.png"
-        )
-        
-        return {
-            "success": True,
-            "sessionId": session_id,
-            "filePath": file_path,
-            "fileType": file_type,
-            "message": f"{file_type.capitalize()} image uploaded successfully"
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Reject oversized bodies and invalid uploads before any database or disk work
+    check_content_length(request, MAX_UPLOAD_BYTES)
+    
+    if file_type not in UPLOAD_FILE_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+    
+    if not is_allowed_image(file):
+        raise HTTPException(status_code=400, detail="File must be an image")
+    
+    # Verify session exists and user owns it
+    if not await service.is_session_owner(session_id, current_user["id"]):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # Save file
+    file_path = await service.save_uploaded_file(
+        session_id=session_id,
+        file=file,
+        file_type=file_type,
+        filename=file.filename or "image.png"
+    )
+    
+    return {
+        "success": True,
+        "sessionId": session_id,
+        "filePath": file_path,
+        "fileType": file_type,
+        "message": f"{file_type.capitalize()} image uploaded successfully"
+    }
 
 
 # ============================================
@@ -337,22 +329,14 @@ async def add_verification_result(
 ):
     """Add a verification result to Video KYC session"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(result_data.sessionId)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        result = await service.add_verification_result(result_data)
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Ownership is checked by the insert itself
+    result = await service.add_verification_result(result_data, current_user["id"])
+    if not result:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return result
 
 
 # ============================================
@@ -366,35 +350,20 @@ async def run_ai_analysis(
 ):
     """Run AI analysis on Video KYC session"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(request_data.sessionId)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        analysis_results = await service.run_ai_analysis(request_data.sessionId)
-        
-        return {
-            "success": True,
-            "sessionId": request_data.sessionId,
-            "documentVerified": analysis_results["documentVerified"],
-            "faceMatched": analysis_results["faceMatched"],
-            "livenessChecked": analysis_results["livenessChecked"],
-            "forgeryScore": analysis_results["forgeryScore"],
-            "faceMatchScore": analysis_results["faceMatchScore"],
-            "deepfakeScore": analysis_results["deepfakeScore"],
-            "riskScore": analysis_results["riskScore"],
-            "recommendation": analysis_results["recommendation"],
-            "details": analysis_results
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Ownership is checked by the status update that starts the analysis
+    analysis_results = await service.run_ai_analysis(request_data.sessionId, current_user["id"])
+    if not analysis_results:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # The service result already carries every response field
+    return VideoKYCAIAnalysisResponse(
+        success=True,
+        sessionId=request_data.sessionId,
+        details=analysis_results,
+        **analysis_results
+    )
 
 
 # ============================================
@@ -408,68 +377,78 @@ async def complete_session(
 ):
     """Complete Video KYC session with final decision"""
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
-        # Verify session exists and user owns it
-        session = await service.get_session(request_data.sessionId)
-        if not session or session["userId"] != current_user["id"]:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        completed_session = await service.complete_session(
-            session_id=request_data.sessionId,
-            final_decision=request_data.finalDecision,
-            agent_name=request_data.agentName,
-            agent_review_notes=request_data.agentReviewNotes,
-            rejection_reason=request_data.rejectionReason
-        )
-        
-        return {
-            "success": True,
-            "sessionId": request_data.sessionId,
-            "finalDecision": request_data.finalDecision,
-            "message": "Session completed successfully",
-            "session": completed_session
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Ownership is checked by the update itself
+    completed_session = await service.complete_session(
+        session_id=request_data.sessionId,
+        final_decision=request_data.finalDecision,
+        user_id=current_user["id"],
+        agent_name=request_data.agentName,
+        agent_review_notes=request_data.agentReviewNotes,
+        rejection_reason=request_data.rejectionReason
+    )
+    
+    if not completed_session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return VideoKYCSessionCompleteResponse(
+        success=True,
+        sessionId=request_data.sessionId,
+        finalDecision=request_data.finalDecision,
+        message="Session completed successfully",
+        session=completed_session
+    )
 
 
 # ============================================
 # Session History
 # ============================================
 
-@router.get("/session/history", response_model=VideoKYCSessionHistoryResponse)
+@router.get("/session/history", response_model=None, responses={200: {"model": VideoKYCSessionHistoryResponse}})
 async def get_session_history(
     limit: int = 10,
     page: int = 1,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get user's Video KYC session history"""
+    """Get user's Video KYC session history
+    
+    Pass a previous response's nextCursor as cursor to page by keyset; page is
+    then ignored and no total is computed.
+    """
     
-    pool = get_db_pool()
-    service = VideoKYCService(pool)
+    service = _service()
     
-    try:
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        sessions = await service.get_user_sessions_after(
+            user_id=current_user["id"],
+            cursor=position,
+            limit=limit
+        )
+        total = None
+    else:
         skip = (page - 1) * limit
-        sessions = await service.get_user_sessions(
+        # Page and total come back from one windowed query
+        sessions, total = await service.get_user_sessions_with_count(
             user_id=current_user["id"],
             limit=limit,
             skip=skip
         )
-        
-        total = await service.get_session_count(current_user["id"])
-        
-        return {
-            "sessions": sessions,
-            "total": total,
-            "page": page,
-            "pageSize": limit
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    # Rows are serialized straight to JSON; the schema only documents the shape
+    return video_kyc_history_response(
+        sessions,
+        total=total,
+        page=page,
+        page_size=limit,
+        next_cursor=(
+            encode_cursor(sessions[-1]["sessionStartedAt"], sessions[-1]["id"])
+            if len(sessions) == limit else None
+        )
+    )
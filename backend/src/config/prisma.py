@@ -6,10 +6,13 @@ Handles PostgreSQL connection with connection pooling and error handling.
 """
 
 import os
+import asyncio
 import asyncpg
-from typing import Optional, Dict, Any
+import orjson
+from typing import Optional, Dict, Any, List
 import logging
-import uuid
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -28,50 +31,129 @@ def get_db_pool() -> asyncpg.Pool:
         raise RuntimeError("Database pool not initialized. Call set_db_pool first.")
     return _db_pool
 
+@lru_cache(maxsize=64)
+def _user_update_query(columns: tuple, where_column: str) -> str:
+    """Build the UPDATE statement for one set of user columns, always bumping updatedAt"""
+    set_clauses = [f'"{column}" = ${i}' for i, column in enumerate(columns, start=1)]
+    set_clauses.append('"updatedAt" = now()')
+    return f'''
+        UPDATE "users" 
+        SET {", ".join(set_clauses)}
+        WHERE {where_column} = ${len(columns) + 1}
+        RETURNING *
+    '''
+
+def _encode_jsonb(value: Any) -> bytes:
+    """Binary jsonb encoder: orjson output behind the format version byte
+    
+    Strings are taken to be JSON text already and are sent as they are.
+    """
+    if isinstance(value, str):
+        return b"\x01" + value.encode()
+    return b"\x01" + orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _decode_jsonb(data: bytes) -> str:
+    """Binary jsonb decoder returning the JSON text, as asyncpg's default codec does"""
+    return data[1:].decode()
+
+def _dump_metadata(metadata: Dict[str, Any]) -> str:
+    """Serialize feature metadata for a JSON column, accepting numpy scalars and arrays"""
+    return orjson.dumps(metadata, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+# Fixed statements on the hottest paths, prepared once on every pooled connection
+_PREPARED_SQL = {
+    "find_user_by_email": 'SELECT * FROM "users" WHERE email = $1',
+    "find_user_by_id": 'SELECT * FROM "users" WHERE id = $1',
+    "create_session": """
+        INSERT INTO "sessions" (id, "userId", token, "refreshToken", "expiresAt", "createdAt", "updatedAt")
+        VALUES (gen_random_uuid()::text, $1, $2, $3, $4, NOW(), NOW())
+        RETURNING *
+    """,
+    "create_verification_session": """
+        INSERT INTO "verification_sessions" (
+            id, "userId", "documentPath", "forgeryScore", decision, "createdAt", "updatedAt"
+        )
+        VALUES (gen_random_uuid()::text, $1, $2, $3, $4, NOW(), NOW())
+        RETURNING *
+    """,
+    "create_feature_result": """
+        INSERT INTO "feature_results" (id, "sessionId", "featureName", score, metadata, "createdAt")
+        VALUES (gen_random_uuid()::text, $1, $2, $3, $4, NOW())
+        RETURNING *
+    """,
+}
+
+class PreparedConnection(asyncpg.Connection):
+    """Pool connection class carrying the statements prepared by init_connection"""
+    statements: Dict[str, asyncpg.prepared_stmt.PreparedStatement]
+
+async def init_connection(conn: PreparedConnection):
+    """Pool init hook: register the jsonb codec, then prepare the fixed statements"""
+    await conn.set_type_codec(
+        "jsonb", encoder=_encode_jsonb, decoder=_decode_jsonb,
+        schema="pg_catalog", format="binary"
+    )
+    conn.statements = {name: await conn.prepare(sql) for name, sql in _PREPARED_SQL.items()}
+
+async def pool_heartbeat(pool: asyncpg.Pool, interval: float = 60.0):
+    """Ping up to min_size idle connections every interval so servers and proxies keep them open
+    
+    Connections beyond min_size are left unpinged, so max_inactive_connection_lifetime
+    can still close them and the pool shrinks back after a burst.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        idle = min(pool.get_idle_size(), pool.get_min_size())
+        # Concurrent pings each take a different idle connection; the pool hands
+        # out its most recently used ones first, leaving the oldest to expire
+        results = await asyncio.gather(
+            *(pool.execute("SELECT 1") for _ in range(idle)), return_exceptions=True
+        )
+        failed = sum(isinstance(r, Exception) for r in results)
+        if failed:
+            logger.warning(f"[DB] Heartbeat failed on {failed} of {idle} idle connections")
+
+@asynccontextmanager
+async def _connection(conn: Optional[asyncpg.Connection] = None):
+    """Use the caller's connection when one is passed, otherwise borrow one from the pool"""
+    if conn is not None:
+        yield conn
+        return
+    
+    async with get_db_pool().acquire() as pooled:
+        yield pooled
+
 # Database client wrapper
 class DatabaseClient:
     """Database client with Prisma-like interface"""
     
     class UserModel:
         @staticmethod
-        async def find_unique(where: Dict[str, Any]):
+        async def find_unique(where: Dict[str, Any], conn: Optional[asyncpg.Connection] = None):
             """Find a unique user by email"""
-            pool = get_db_pool()
-            
-            async with pool.acquire() as conn:
+            async with _connection(conn) as conn:
                 if "email" in where:
-                    result = await conn.fetchrow(
-                        'SELECT * FROM "users" WHERE email = $1',
-                        where["email"]
-                    )
+                    result = await conn.statements["find_user_by_email"].fetchrow(where["email"])
                     return dict(result) if result else None
                 elif "id" in where:
-                    result = await conn.fetchrow(
-                        'SELECT * FROM "users" WHERE id = $1',
-                        where["id"]
-                    )
+                    result = await conn.statements["find_user_by_id"].fetchrow(where["id"])
                     return dict(result) if result else None
                 return None
 
         @staticmethod
-        async def create(data: Dict[str, Any]):
+        async def create(data: Dict[str, Any], conn: Optional[asyncpg.Connection] = None):
             """Create a new user"""
-            pool = get_db_pool()
-            
-            user_id = str(uuid.uuid4())
-            now = datetime.utcnow()
-            
-            async with pool.acquire() as conn:
+            # id and timestamps are generated by Postgres in the VALUES list
+            async with _connection(conn) as conn:
                 result = await conn.fetchrow("""
                     INSERT INTO "users" (
                         id, email, "passwordHash", "firstName", "lastName", 
                         phone, role, status, "emailVerified", "phoneVerified",
                         "createdAt", "updatedAt"
                     )
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+                    VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, $9, NOW(), NOW())
                     RETURNING *
                 """,
-                    user_id,
                     data.get("email"),
                     data.get("passwordHash"),
                     data.get("firstName"),
@@ -80,83 +162,41 @@ class DatabaseClient:
                     data.get("role", "USER"),
                     data.get("status", "ACTIVE"),
                     data.get("emailVerified", False),
-                    data.get("phoneVerified", False),
-                    now,
-                    now
+                    data.get("phoneVerified", False)
                 )
                 return dict(result) if result else None
 
         @staticmethod
-        async def update(where: Dict[str, Any], data: Dict[str, Any]):
+        async def update(where: Dict[str, Any], data: Dict[str, Any], conn: Optional[asyncpg.Connection] = None):
             """Update a user"""
-            pool = get_db_pool()
-            now = datetime.utcnow()
+            if "id" in where:
+                where_column = "id"
+            elif "email" in where:
+                where_column = "email"
+            else:
+                return None
             
-            async with pool.acquire() as conn:
-                # Build dynamic UPDATE query
-                set_clauses = []
-                params = []
-                param_count = 1
-                
-                for key, value in data.items():
-                    if key == "passwordHash":
-                        set_clauses.append(f'"passwordHash" = ${param_count}')
-                    elif key == "lastLoginAt":
-                        set_clauses.append(f'"lastLoginAt" = ${param_count}')
-                    else:
-                        set_clauses.append(f'"{key}" = ${param_count}')
-                    params.append(value)
-                    param_count += 1
-                
-                # Always update updatedAt
-                set_clauses.append(f'"updatedAt" = ${param_count}')
-                params.append(now)
-                param_count += 1
-                
-                # Add WHERE clause
-                if "id" in where:
-                    where_clause = f'id = ${param_count}'
-                    params.append(where["id"])
-                elif "email" in where:
-                    where_clause = f'email = ${param_count}'
-                    params.append(where["email"])
-                else:
-                    return None
-                
-                query = f'''
-                    UPDATE "users" 
-                    SET {", ".join(set_clauses)}
-                    WHERE {where_clause}
-                    RETURNING *
-                '''
-                
+            # Query text is built once per update shape; params follow the sorted columns
+            columns = tuple(sorted(data))
+            query = _user_update_query(columns, where_column)
+            params = [data[column] for column in columns]
+            params.append(where[where_column])
+            
+            async with _connection(conn) as conn:
                 result = await conn.fetchrow(query, *params)
                 return dict(result) if result else None
 
     class SessionModel:
         @staticmethod
-        async def create(data: Dict[str, Any]):
+        async def create(data: Dict[str, Any], conn: Optional[asyncpg.Connection] = None):
             """Create a session"""
-            pool = get_db_pool()
-            
-            session_id = str(uuid.uuid4())
-            now = datetime.utcnow()
-            
-            async with pool.acquire() as conn:
-                result = await conn.fetchrow("""
-                    INSERT INTO "sessions" (
-                        id, "userId", token, "refreshToken", "expiresAt", "createdAt", "updatedAt"
-                    )
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
-                    RETURNING *
-                """,
-                    session_id,
+            # id and timestamps are generated by Postgres in the VALUES list
+            async with _connection(conn) as conn:
+                result = await conn.statements["create_session"].fetchrow(
                     data.get("userId"),
                     data.get("token"),
                     data.get("refreshToken"),
-                    data.get("expiresAt"),
-                    now,
-                    now
+                    data.get("expiresAt")
                 )
                 return dict(result) if result else None
 
@@ -166,55 +206,264 @@ class DatabaseClient:
             """Create a verification session"""
             pool = get_db_pool()
             
-            session_id = str(uuid.uuid4())
-            now = datetime.utcnow()
+            # id and timestamps are generated by Postgres in the VALUES list
+            async with pool.acquire() as conn:
+                result = await conn.statements["create_verification_session"].fetchrow(
+                    data.get("userId"),
+                    data.get("documentPath"),
+                    data.get("forgeryScore", 0.0),
+                    data.get("decision", "PENDING")
+                )
+                return dict(result) if result else None
+
+        @staticmethod
+        async def create_with_feature_result(data: Dict[str, Any], feature: Dict[str, Any]):
+            """Create a verification session and its feature result in one statement"""
+            pool = get_db_pool()
             
             async with pool.acquire() as conn:
+                # Single round-trip: the CTE inserts both rows atomically;
+                # ids and timestamps are generated by Postgres in the VALUES lists
                 result = await conn.fetchrow("""
-                    INSERT INTO "verification_sessions" (
-                        id, "userId", "documentPath", "forgeryScore", decision, "createdAt", "updatedAt"
+                    WITH new_session AS (
+                        INSERT INTO "verification_sessions" (
+                            id, "userId", "documentPath", "selfiePath", "documentHash",
+                            "forgeryScore", "faceMatchScore", decision, "createdAt", "updatedAt"
+                        )
+                        VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, NOW(), NOW())
+                        RETURNING *
+                    ), new_result AS (
+                        INSERT INTO "feature_results" (
+                            id, "sessionId", "featureName", score, metadata, "createdAt"
+                        )
+                        SELECT gen_random_uuid()::text, id, $8::text, $9::float8, $10::jsonb, "createdAt" FROM new_session
                     )
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
-                    RETURNING *
+                    SELECT * FROM new_session
                 """,
-                    session_id,
                     data.get("userId"),
                     data.get("documentPath"),
-                    data.get("forgeryScore", 0.0),
+                    data.get("selfiePath"),
+                    data.get("documentHash"),
+                    data.get("forgeryScore"),
+                    data.get("faceMatchScore"),
                     data.get("decision", "PENDING"),
-                    now,
-                    now
+                    feature.get("featureName"),
+                    feature.get("score", 0.0),
+                    feature.get("metadata", {})
                 )
                 return dict(result) if result else None
 
-    class FeatureResultModel:
         @staticmethod
-        async def create(data: Dict[str, Any]):
-            """Create a feature result"""
+        async def find_by_document_hash(user_id: str, document_hash: str, feature_name: str):
+            """Find a user's earlier session for the same upload, with its feature result"""
             pool = get_db_pool()
             
-            result_id = str(uuid.uuid4())
-            now = datetime.utcnow()
+            async with pool.acquire() as conn:
+                result = await conn.fetchrow("""
+                    SELECT s.*, f.score, f.metadata
+                    FROM "verification_sessions" s
+                    JOIN "feature_results" f ON f."sessionId" = s.id
+                    WHERE s."userId" = $1 AND s."documentHash" = $2 AND f."featureName" = $3
+                    ORDER BY s."createdAt" DESC
+                    LIMIT 1
+                """, user_id, document_hash, feature_name)
+                if not result:
+                    return None
+                
+                session = dict(result)
+                if isinstance(session["metadata"], str):
+                    session["metadata"] = orjson.loads(session["metadata"])
+                return session
+
+        @staticmethod
+        async def find_scores(session_id: str):
+            """Fetch only the owner and feature score columns of a session"""
+            pool = get_db_pool()
             
             async with pool.acquire() as conn:
-                import json
                 result = await conn.fetchrow("""
-                    INSERT INTO "feature_results" (
-                        id, "sessionId", "featureName", score, metadata, "createdAt", "updatedAt"
+                    SELECT id, "userId", "forgeryScore", "faceMatchScore", "deepfakeScore", "createdAt"
+                    FROM "verification_sessions"
+                    WHERE id = $1
+                """, session_id)
+                return dict(result) if result else None
+
+        @staticmethod
+        async def find_many_for_user(session_ids: List[str], user_id: str):
+            """Fetch the user's sessions among session_ids in one query"""
+            pool = get_db_pool()
+            
+            async with pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT id, "forgeryScore", "faceMatchScore", "deepfakeScore", "createdAt"
+                    FROM "verification_sessions"
+                    WHERE id = ANY($1::text[]) AND "userId" = $2
+                """, session_ids, user_id)
+                return [dict(row) for row in rows]
+
+        @staticmethod
+        async def save_risk_assessments(assessments: List[Dict[str, Any]]):
+            """Write risk scores, decisions and risk_scoring results for many sessions in one statement
+            
+            Returns the updatedAt timestamp written to the sessions.
+            """
+            pool = get_db_pool()
+            
+            async with pool.acquire() as conn:
+                # Single round-trip: one multi-row UPDATE and one multi-row INSERT
+                # over the same unnested arrays, applied atomically by the CTE;
+                # ids and timestamps are generated by Postgres
+                return await conn.fetchval("""
+                    WITH input AS (
+                        SELECT *
+                        FROM unnest($1::text[], $2::float8[], $3::text[], $4::text[])
+                            AS t("sessionId", "riskScore", decision, metadata)
+                    ), updated AS (
+                        UPDATE "verification_sessions" s
+                        SET "riskScore" = input."riskScore", decision = input.decision, "updatedAt" = NOW()
+                        FROM input
+                        WHERE s.id = input."sessionId"
+                        RETURNING s.id
+                    ), inserted AS (
+                        INSERT INTO "feature_results" (
+                            id, "sessionId", "featureName", score, metadata, "createdAt"
+                        )
+                        SELECT gen_random_uuid()::text, input."sessionId", 'risk_scoring',
+                               input."riskScore", input.metadata::jsonb, NOW()
+                        FROM input
+                        JOIN updated ON updated.id = input."sessionId"
                     )
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
-                    RETURNING *
+                    SELECT LOCALTIMESTAMP(3)
+                """,
+                    [a["sessionId"] for a in assessments],
+                    [a["riskScore"] for a in assessments],
+                    [a["decision"] for a in assessments],
+                    [_dump_metadata(a["metadata"]) for a in assessments]
+                )
+
+        @staticmethod
+        async def save_risk_assessment(assessment: Dict[str, Any]):
+            """Write one session's risk score, decision and risk_scoring result in one statement
+            
+            Returns the updatedAt timestamp written to the session.
+            """
+            pool = get_db_pool()
+            
+            async with pool.acquire() as conn:
+                # Single round-trip: the CTE updates the session and inserts the result atomically;
+                # ids and timestamps are generated by Postgres
+                return await conn.fetchval("""
+                    WITH updated AS (
+                        UPDATE "verification_sessions"
+                        SET "riskScore" = $1, decision = $2, "updatedAt" = NOW()
+                        WHERE id = $3
+                        RETURNING id
+                    ), inserted AS (
+                        INSERT INTO "feature_results" (
+                            id, "sessionId", "featureName", score, metadata, "createdAt"
+                        )
+                        SELECT gen_random_uuid()::text, id, 'risk_scoring', $1, $4::jsonb, NOW() FROM updated
+                    )
+                    SELECT LOCALTIMESTAMP(3)
                 """,
-                    result_id,
+                    assessment["riskScore"],
+                    assessment["decision"],
+                    assessment["sessionId"],
+                    assessment["metadata"]
+                )
+
+        @staticmethod
+        async def stats_for_user(user_id: str, start_date: datetime, end_date: datetime):
+            """Count a user's sessions by completion and decision within a date range"""
+            pool = get_db_pool()
+            
+            async with pool.acquire() as conn:
+                result = await conn.fetchrow("""
+                    SELECT
+                        COUNT(*) AS total,
+                        COUNT("riskScore") AS completed,
+                        COUNT(*) FILTER (WHERE decision = 'APPROVED') AS approved,
+                        COUNT(*) FILTER (WHERE decision = 'REJECTED') AS rejected,
+                        COUNT(*) FILTER (WHERE decision = 'MANUAL_REVIEW') AS manual_review
+                    FROM "verification_sessions"
+                    WHERE "userId" = $1 AND "createdAt" BETWEEN $2 AND $3
+                """, user_id, start_date, end_date)
+                return dict(result)
+
+        @staticmethod
+        async def risk_distribution(start_date: datetime, end_date: datetime, bounds: List[float]):
+            """Bucket assessed sessions by risk level and average their risk scores
+            
+            bounds are the inclusive upper scores of the LOW, MEDIUM and HIGH levels.
+            """
+            pool = get_db_pool()
+            low, medium, high = bounds
+            
+            async with pool.acquire() as conn:
+                result = await conn.fetchrow("""
+                    SELECT
+                        COUNT(*) AS total,
+                        COUNT(*) FILTER (WHERE "riskScore" <= $3) AS low,
+                        COUNT(*) FILTER (WHERE "riskScore" > $3 AND "riskScore" <= $4) AS medium,
+                        COUNT(*) FILTER (WHERE "riskScore" > $4 AND "riskScore" <= $5) AS high,
+                        COUNT(*) FILTER (WHERE "riskScore" > $5) AS critical,
+                        AVG("riskScore") AS average
+                    FROM "verification_sessions"
+                    WHERE "createdAt" BETWEEN $1 AND $2 AND "riskScore" IS NOT NULL
+                """, start_date, end_date, low, medium, high)
+                return dict(result)
+
+    class FeatureResultModel:
+        @staticmethod
+        async def create(data: Dict[str, Any]):
+            """Create a feature result"""
+            pool = get_db_pool()
+            
+            # id and createdAt are generated by Postgres in the VALUES list
+            async with pool.acquire() as conn:
+                result = await conn.statements["create_feature_result"].fetchrow(
                     data.get("sessionId"),
                     data.get("featureName"),
                     data.get("score", 0.0),
-                    json.dumps(data.get("metadata", {})),
-                    now,
-                    now
+                    data.get("metadata", {})
                 )
                 return dict(result) if result else None
 
+        @staticmethod
+        async def find_for_user(session_id: str, feature_name: str, user_id: str, decode_metadata: bool = True):
+            """Find a session's feature result, only if the session belongs to the user
+            
+            With decode_metadata=False the metadata is left as the JSON text stored in Postgres.
+            """
+            pool = get_db_pool()
+            
+            async with pool.acquire() as conn:
+                result = await conn.fetchrow("""
+                    SELECT f."sessionId", f."featureName", f.score, f.metadata, f."createdAt"
+                    FROM "feature_results" f
+                    JOIN "verification_sessions" s ON s.id = f."sessionId"
+                    WHERE f."sessionId" = $1 AND f."featureName" = $2 AND s."userId" = $3
+                    LIMIT 1
+                """, session_id, feature_name, user_id)
+                if not result:
+                    return None
+                
+                feature_result = dict(result)
+                if decode_metadata and isinstance(feature_result["metadata"], str):
+                    feature_result["metadata"] = orjson.loads(feature_result["metadata"])
+                return feature_result
+
+    @staticmethod
+    @asynccontextmanager
+    async def transaction():
+        """Hold one pooled connection and transaction across several model calls
+        
+        Pass the yielded connection as conn= to the model methods that accept it.
+        """
+        async with get_db_pool().acquire() as conn:
+            async with conn.transaction():
+                yield conn
+
     def __init__(self):
         self.user = self.UserModel()
         self.session = self.SessionModel()
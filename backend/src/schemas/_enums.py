@@ -0,0 +1,68 @@
+"""
+Shared Enums
+
+Every str Enum used by the schema modules, defined once so that each
+model field referencing the same enum reuses a single class.
+"""
+
+from enum import Enum
+
+
+class VerificationDecision(str, Enum):
+    """Verification decision shared by verification and Video KYC sessions"""
+    APPROVED = "APPROVED"
+    REJECTED = "REJECTED"
+    MANUAL_REVIEW = "MANUAL_REVIEW"
+    PENDING = "PENDING"
+
+
+class FeatureType(str, Enum):
+    FAKE_DOCUMENT = "fake_document"
+    FACE_MATCHING = "face_matching"
+    DEEPFAKE = "deepfake"
+    RISK_SCORING = "risk_scoring"
+
+
+class EkycStatusEnum(str, Enum):
+    """E-KYC session status"""
+    PENDING = "PENDING"
+    DOCUMENT_UPLOADED = "DOCUMENT_UPLOADED"
+    SELFIE_UPLOADED = "SELFIE_UPLOADED"
+    PROCESSING = "PROCESSING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    MANUAL_REVIEW = "MANUAL_REVIEW"
+
+
+class EkycDecisionEnum(str, Enum):
+    """E-KYC verification decision"""
+    APPROVED = "APPROVED"
+    REJECTED = "REJECTED"
+    REVIEW_REQUIRED = "REVIEW_REQUIRED"
+    PENDING = "PENDING"
+
+
+class DocumentTypeEnum(str, Enum):
+    """Document type"""
+    PASSPORT = "PASSPORT"
+    DRIVERS_LICENSE = "DRIVERS_LICENSE"
+    NATIONAL_ID = "NATIONAL_ID"
+    RESIDENCE_PERMIT = "RESIDENCE_PERMIT"
+    VOTER_ID = "VOTER_ID"
+
+
+class VideoKYCStatusEnum(str, Enum):
+    IDLE = "IDLE"
+    IN_PROGRESS = "IN_PROGRESS"
+    DOCUMENT_VERIFICATION = "DOCUMENT_VERIFICATION"
+    AI_ANALYSIS = "AI_ANALYSIS"
+    AGENT_REVIEW = "AGENT_REVIEW"
+    COMPLETED = "COMPLETED"
+    REJECTED = "REJECTED"
+    EXPIRED = "EXPIRED"
+
+
+class MessageTypeEnum(str, Enum):
+    AGENT = "agent"
+    USER = "user"
+    SYSTEM = "system"
@@ -4,38 +4,12 @@ E-KYC Schemas
 Pydantic models for e-KYC verification requests and responses.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from pydantic.alias_generators import to_camel
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from enum import Enum
 
-
-class EkycStatusEnum(str, Enum):
-    """E-KYC session status"""
-    PENDING = "PENDING"
-    DOCUMENT_UPLOADED = "DOCUMENT_UPLOADED"
-    SELFIE_UPLOADED = "SELFIE_UPLOADED"
-    PROCESSING = "PROCESSING"
-    COMPLETED = "COMPLETED"
-    FAILED = "FAILED"
-    MANUAL_REVIEW = "MANUAL_REVIEW"
-
-
-class EkycDecisionEnum(str, Enum):
-    """E-KYC verification decision"""
-    APPROVED = "APPROVED"
-    REJECTED = "REJECTED"
-    REVIEW_REQUIRED = "REVIEW_REQUIRED"
-    PENDING = "PENDING"
-
-
-class DocumentTypeEnum(str, Enum):
-    """Document type"""
-    PASSPORT = "PASSPORT"
-    DRIVERS_LICENSE = "DRIVERS_LICENSE"
-    NATIONAL_ID = "NATIONAL_ID"
-    RESIDENCE_PERMIT = "RESIDENCE_PERMIT"
-    VOTER_ID = "VOTER_ID"
+from src.schemas._enums import EkycStatusEnum, EkycDecisionEnum, DocumentTypeEnum
 
 
 # ===== Request Models =====
@@ -66,71 +40,85 @@ class EkycRunRequest(BaseModel):
 class EkycDocumentResponse(BaseModel):
     """E-KYC document response"""
     id: str
-    session_id: str = Field(..., alias="sessionId")
+    session_id: str
     type: str
-    front_image_url: str = Field(..., alias="frontImageUrl")
-    back_image_url: Optional[str] = Field(None, alias="backImageUrl")
-    document_number: Optional[str] = Field(None, alias="documentNumber")
-    full_name: Optional[str] = Field(None, alias="fullName")
-    date_of_birth: Optional[str] = Field(None, alias="dateOfBirth")
-    expiry_date: Optional[str] = Field(None, alias="expiryDate")
-    issuing_country: Optional[str] = Field(None, alias="issuingCountry")
-    is_authentic: Optional[bool] = Field(None, alias="isAuthentic")
-    confidence_score: Optional[float] = Field(None, alias="confidenceScore")
-    tampering_detected: bool = Field(..., alias="tamperingDetected")
-    uploaded_at: datetime = Field(..., alias="uploadedAt")
-    processed_at: Optional[datetime] = Field(None, alias="processedAt")
-
-    class Config:
-        from_attributes = True
-        populate_by_name = True
+    front_image_url: str
+    back_image_url: Optional[str] = None
+    document_number: Optional[str] = None
+    full_name: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    expiry_date: Optional[str] = None
+    issuing_country: Optional[str] = None
+    is_authentic: Optional[bool] = None
+    confidence_score: Optional[float] = None
+    tampering_detected: bool
+    uploaded_at: datetime
+    processed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True, alias_generator=to_camel, frozen=True)
 
 
 class EkycResultResponse(BaseModel):
     """E-KYC verification result response"""
     id: str
-    session_id: str = Field(..., alias="sessionId")
-    verification_type: str = Field(..., alias="verificationType")
+    session_id: str
+    verification_type: str
     score: float
-    is_passed: bool = Field(..., alias="isPassed")
+    is_passed: bool
     confidence: Optional[float]
-    details: Optional[Dict[str, Any]]
-    model_version: Optional[str] = Field(None, alias="modelVersion")
-    processed_at: datetime = Field(..., alias="processedAt")
-    processing_time: Optional[int] = Field(None, alias="processingTime")
+    details: Optional[dict]
+    model_version: Optional[str] = None
+    processed_at: datetime
+    processing_time: Optional[int] = None
 
-    class Config:
-        from_attributes = True
-        populate_by_name = True
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True, alias_generator=to_camel, frozen=True)
+
+
+# Shared list validators for a session's nested documents and results
+_DOCUMENT_LIST = TypeAdapter(List[EkycDocumentResponse])
+_RESULT_LIST = TypeAdapter(List[EkycResultResponse])
 
 
 class EkycSessionResponse(BaseModel):
     """E-KYC session response"""
     id: str
-    user_id: Optional[str] = Field(None, alias="userId")
-    session_id: str = Field(..., alias="sessionId")
+    user_id: Optional[str] = None
+    session_id: str
     status: str
     decision: str
-    document_score: Optional[float] = Field(None, alias="documentScore")
-    face_match_score: Optional[float] = Field(None, alias="faceMatchScore")
-    liveness_score: Optional[float] = Field(None, alias="livenessScore")
-    overall_score: Optional[float] = Field(None, alias="overallScore")
-    rejection_reason: Optional[str] = Field(None, alias="rejectionReason")
-    review_notes: Optional[str] = Field(None, alias="reviewNotes")
-    created_at: datetime = Field(..., alias="createdAt")
-    updated_at: datetime = Field(..., alias="updatedAt")
-    completed_at: Optional[datetime] = Field(None, alias="completedAt")
+    document_score: Optional[float] = None
+    face_match_score: Optional[float] = None
+    liveness_score: Optional[float] = None
+    overall_score: Optional[float] = None
+    rejection_reason: Optional[str] = None
+    review_notes: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    completed_at: Optional[datetime] = None
     documents: List[EkycDocumentResponse] = []
     results: List[EkycResultResponse] = []
 
-    class Config:
-        from_attributes = True
-        populate_by_name = True
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True, alias_generator=to_camel, frozen=True)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "EkycSessionResponse":
+        """Build from an ekyc_sessions row without re-validating its typed columns
+        
+        Documents and results arrive as decoded JSON, so they are still validated.
+        """
+        return cls.model_construct(**{
+            **row,
+            "documents": _DOCUMENT_LIST.validate_python(row.get("documents", [])),
+            "results": _RESULT_LIST.validate_python(row.get("results", [])),
+        })
 
 
 class EkycSessionHistoryResponse(BaseModel):
     """E-KYC session history response"""
     sessions: List[EkycSessionResponse]
-    total: int
+    total: Optional[int] = None  # Omitted for cursor-based pages
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+    model_config = ConfigDict(frozen=True)
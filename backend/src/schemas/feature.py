@@ -1,13 +1,8 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from enum import Enum
 
-class FeatureType(str, Enum):
-    FAKE_DOCUMENT = "fake_document"
-    FACE_MATCHING = "face_matching"
-    DEEPFAKE = "deepfake"
-    RISK_SCORING = "risk_scoring"
+from src.schemas._enums import FeatureType
 
 class DocumentUpload(BaseModel):
     document_image: str  # Base64 encoded or file path
@@ -17,6 +12,9 @@ class FaceMatchingRequest(BaseModel):
     document_image: str  # Base64 encoded or file path
     selfie_image: str    # Base64 encoded or file path
 
+class FaceMatchingBatchRequest(BaseModel):
+    pairs: List[FaceMatchingRequest] = Field(..., min_length=1, max_length=8)
+
 class DeepfakeRequest(BaseModel):
     media_file: str      # Base64 encoded or file path
     media_type: str      # 'image' or 'video'
@@ -29,7 +27,7 @@ class FeatureRunResponse(BaseModel):
     session_id: str
     feature_name: str
     score: float
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[dict] = None
     processing_time_ms: Optional[int] = None
     status: str = "completed"
     created_at: datetime
@@ -39,7 +37,7 @@ class FeatureResultResponse(BaseModel):
     session_id: str
     feature_name: str
     score: float
-    metadata: Optional[Dict[str, Any]] = None
+    metadata: Optional[dict] = None
     created_at: datetime
     
     class Config:
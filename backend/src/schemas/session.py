@@ -1,13 +1,8 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
 from datetime import datetime
-from enum import Enum
 
-class VerificationDecision(str, Enum):
-    APPROVED = "APPROVED"
-    REJECTED = "REJECTED"
-    MANUAL_REVIEW = "MANUAL_REVIEW"
-    PENDING = "PENDING"
+from src.schemas._enums import VerificationDecision
 
 class VerificationSessionCreate(BaseModel):
     document_path: Optional[str] = None
@@ -33,16 +28,17 @@ class VerificationSessionResponse(BaseModel):
     createdAt: datetime
     updatedAt: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 class SessionSummaryResponse(BaseModel):
     session: VerificationSessionResponse
-    feature_results: List[Dict[str, Any]]
+    feature_results: List[dict]
     overall_status: str
     risk_level: str
     recommendations: List[str]
 
+    model_config = ConfigDict(frozen=True)
+
 class SessionListResponse(BaseModel):
     sessions: List[VerificationSessionResponse]
     total: int
@@ -50,6 +46,8 @@ class SessionListResponse(BaseModel):
     page_size: int
     has_next: bool
 
+    model_config = ConfigDict(frozen=True)
+
 class SessionStatsResponse(BaseModel):
     total_sessions: int
     completed_sessions: int
@@ -59,3 +57,5 @@ class SessionStatsResponse(BaseModel):
     manual_review_sessions: int
     average_processing_time: Optional[float] = None
     success_rate: Optional[float] = None
+
+    model_config = ConfigDict(frozen=True)
@@ -2,34 +2,14 @@
 Video KYC Schemas - Request/Response validation for Video KYC API
 """
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from enum import Enum
 
+from src.schemas._enums import VideoKYCStatusEnum, VerificationDecision, MessageTypeEnum
 
-class VideoKYCStatusEnum(str, Enum):
-    IDLE = "IDLE"
-    IN_PROGRESS = "IN_PROGRESS"
-    DOCUMENT_VERIFICATION = "DOCUMENT_VERIFICATION"
-    AI_ANALYSIS = "AI_ANALYSIS"
-    AGENT_REVIEW = "AGENT_REVIEW"
-    COMPLETED = "COMPLETED"
-    REJECTED = "REJECTED"
-    EXPIRED = "EXPIRED"
-
-
-class VerificationDecisionEnum(str, Enum):
-    PENDING = "PENDING"
-    APPROVED = "APPROVED"
-    REJECTED = "REJECTED"
-    MANUAL_REVIEW = "MANUAL_REVIEW"
-
-
-class MessageTypeEnum(str, Enum):
-    AGENT = "agent"
-    USER = "user"
-    SYSTEM = "system"
+# Former name of the shared decision enum, kept for existing importers
+VerificationDecisionEnum = VerificationDecision
 
 
 # ============================================
@@ -77,12 +57,23 @@ class VideoKYCSessionResponse(BaseModel):
     forgeryScore: Optional[float] = None
     faceMatchScore: Optional[float] = None
     deepfakeScore: Optional[float] = None
-    finalDecision: VerificationDecisionEnum
+    finalDecision: VerificationDecision
     sessionStartedAt: datetime
     sessionCompletedAt: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "VideoKYCSessionResponse":
+        """Build from a video_kyc_sessions row without re-validating it
+        
+        The row comes straight from a fixed SELECT, so only the enum columns are coerced.
+        """
+        return cls.model_construct(**{
+            **row,
+            "sessionStatus": VideoKYCStatusEnum(row["sessionStatus"]),
+            "finalDecision": VerificationDecision(row["finalDecision"]),
+        })
 
 
 # ============================================
@@ -106,12 +97,11 @@ class VideoKYCQuestionResponse(BaseModel):
     questionText: str
     questionType: str
     questionOrder: int
-    validationRules: Optional[Dict[str, Any]] = None
+    validationRules: Optional[dict] = None
     required: bool
     askedAt: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class VideoKYCAnswerCreate(BaseModel):
@@ -133,12 +123,11 @@ class VideoKYCAnswerResponse(BaseModel):
     imageUrl: Optional[str] = None
     audioUrl: Optional[str] = None
     isValid: bool
-    validationErrors: Optional[Dict[str, Any]] = None
+    validationErrors: Optional[dict] = None
     answeredAt: datetime
     responseTime: Optional[int] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # ============================================
@@ -160,8 +149,7 @@ class VideoKYCChatMessageResponse(BaseModel):
     messageType: str
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # ============================================
@@ -184,6 +172,8 @@ class VideoKYCFileUploadResponse(BaseModel):
     fileType: str
     message: str
 
+    model_config = ConfigDict(frozen=True)
+
 
 # ============================================
 # Verification Results
@@ -209,13 +199,12 @@ class VideoKYCVerificationResultResponse(BaseModel):
     score: float
     confidence: Optional[float] = None
     isPassed: bool
-    details: Optional[Dict[str, Any]] = None
+    details: Optional[dict] = None
     modelVersion: Optional[str] = None
     processedAt: datetime
     processingTime: Optional[int] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # ============================================
@@ -239,7 +228,9 @@ class VideoKYCAIAnalysisResponse(BaseModel):
     deepfakeScore: Optional[float] = None
     riskScore: Optional[float] = None
     recommendation: str
-    details: Dict[str, Any]
+    details: dict
+
+    model_config = ConfigDict(frozen=True)
 
 
 # ============================================
@@ -251,7 +242,7 @@ class VideoKYCSessionCompleteRequest(BaseModel):
     sessionId: str
     agentName: Optional[str] = None
     agentReviewNotes: Optional[str] = None
-    finalDecision: VerificationDecisionEnum
+    finalDecision: VerificationDecision
     rejectionReason: Optional[str] = None
 
 
@@ -259,10 +250,12 @@ class VideoKYCSessionCompleteResponse(BaseModel):
     """Video KYC session completion response"""
     success: bool
     sessionId: str
-    finalDecision: VerificationDecisionEnum
+    finalDecision: VerificationDecision
     message: str
     session: VideoKYCSessionResponse
 
+    model_config = ConfigDict(frozen=True)
+
 
 # ============================================
 # Session History
@@ -271,9 +264,12 @@ class VideoKYCSessionCompleteResponse(BaseModel):
 class VideoKYCSessionHistoryResponse(BaseModel):
     """Video KYC session history"""
     sessions: List[VideoKYCSessionResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     pageSize: int
+    nextCursor: Optional[str] = None
+
+    model_config = ConfigDict(frozen=True)
 
 
 # ============================================
@@ -291,3 +287,5 @@ class VideoKYCIdCaptureResponse(BaseModel):
     processing_time: Optional[int] = None
     quality_score: Optional[float] = None
     message: Optional[str] = None
+
+    model_config = ConfigDict(frozen=True)
@@ -6,8 +6,6 @@ Auto-downloads model from Google Drive if not present.
 """
 
 from __future__ import annotations
-import base64
-import io
 import time
 import logging
 import os
@@ -15,10 +13,14 @@ import tempfile
 import hashlib
 from pathlib import Path
 from typing import Dict, Any, Optional, List, TYPE_CHECKING
-from PIL import Image
 import numpy as np
 import cv2
-from datetime import datetime
+
+# SIMD base64 when available, same API as the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 if TYPE_CHECKING:
     import torch
@@ -29,6 +31,12 @@ logger = logging.getLogger(__name__)
 torch = None
 gdown = None
 
+
+def _fast_iso(ts: float) -> str:
+    """UTC ISO-8601 timestamp for an epoch time, without building a datetime"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ts)) + ".%06d" % (ts % 1 * 1_000_000)
+
+
 class DeepfakeService:
     """Service for detecting deepfakes using trained PyTorch model."""
     
@@ -172,66 +180,58 @@ class DeepfakeService:
             
             logger.info(f"[DEEPFAKE] Extracted {len(frames)} frames")
             
-            # Preprocess frames
+            # Preprocess frames into one (N, C, H, W) batch
             logger.info("[DEEPFAKE] Preprocessing frames...")
-            processed_frames = [self._preprocess_frame(frame) for frame in frames]
+            batch = torch.cat([self._preprocess_frame(frame) for frame in frames])
             
-            # Run inference
-            logger.info("[DEEPFAKE] Running model inference...")
-            predictions = []
-            
-            for idx, frame_tensor in enumerate(processed_frames):
-                with torch.no_grad():
-                    frame_tensor = frame_tensor.to(self.device)
-                    output = self.model(frame_tensor)
-                    
-                    # Get probability (adjust based on model output)
-                    if isinstance(output, torch.Tensor):
-                        if output.shape[-1] == 1:
-                            # Single output (sigmoid)
-                            prob = torch.sigmoid(output).item()
-                        else:
-                            # Binary classification (softmax)
-                            prob = torch.softmax(output, dim=-1)[0][1].item()
-                    else:
-                        prob = float(output)
-                    
-                    predictions.append(prob)
-                    
-                    if (idx + 1) % 10 == 0:
-                        logger.info(f"[DEEPFAKE] Processed {idx + 1}/{len(processed_frames)} frames")
+            # Run inference on every frame in a single forward pass
+            logger.info(f"[DEEPFAKE] Running model inference on {len(frames)} frames...")
+            with torch.no_grad():
+                output = self.model(batch.to(self.device))
+                
+                # Get per-frame probabilities (adjust based on model output)
+                if output.shape[-1] == 1:
+                    # Single output (sigmoid)
+                    probs = torch.sigmoid(output).reshape(-1)
+                else:
+                    # Binary classification (softmax)
+                    probs = torch.softmax(output, dim=-1)[:, 1]
+            
+            predictions = probs.cpu().numpy().astype(np.float64)
             
             # Calculate final score
-            avg_score = float(np.mean(predictions))
-            max_score = float(np.max(predictions))
-            min_score = float(np.min(predictions))
-            std_score = float(np.std(predictions))
+            deepfake_score = float(predictions.mean())
+            
+            # Summary statistics as percentages, rounded together in one call
+            mean_pct, max_pct, min_pct, std_pct = np.round(
+                np.array([deepfake_score, predictions.max(), predictions.min(), predictions.std()]) * 100, 2
+            ).tolist()
             
-            deepfake_score = avg_score
             decision = "FAKE" if deepfake_score >= self.detection_threshold else "REAL"
             
-            processing_time = int((time.time() - start_time) * 1000)
+            finished_at = time.time()
+            processing_time = int((finished_at - start_time) * 1000)
             
             logger.info(f"[DEEPFAKE] Inference complete - Score: {deepfake_score:.4f}")
             logger.info(f"[DEEPFAKE] Decision: {decision}")
             
             result = {
-                "deepfake_score": round(deepfake_score * 100, 2),
+                "deepfake_score": mean_pct,
                 "is_deepfake": decision == "FAKE",
                 "decision": decision,
                 "confidence_level": round(deepfake_score, 4),
                 "frames_analyzed": len(frames),
-                "frame_predictions": [round(p * 100, 2) for p in predictions],
+                "frame_predictions": np.round(predictions * 100, 2).tolist(),
                 "statistics": {
-                    "mean": round(avg_score * 100, 2),
-                    "max": round(max_score * 100, 2),
-                    "min": round(min_score * 100, 2),
-                    "std": round(std_score * 100, 2)
+                    "mean": mean_pct,
+                    "max": max_pct,
+                    "min": min_pct,
+                    "std": std_pct
                 },
                 "processing_time_ms": processing_time,
                 "model_version": self.model_version,
                 "device": str(self.device),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _fast_iso(finished_at)
             }
             
             logger.info("[DEEPFAKE] Analysis complete")
@@ -285,7 +285,8 @@ class DeepfakeService:
             deepfake_score = float(prob)
             decision = "FAKE" if deepfake_score >= self.detection_threshold else "REAL"
             
-            processing_time = int((time.time() - start_time) * 1000)
+            finished_at = time.time()
+            processing_time = int((finished_at - start_time) * 1000)
             
             logger.info(f"[DEEPFAKE] Inference complete - Score: {deepfake_score:.4f}, Decision: {decision}")
             
@@ -298,7 +299,7 @@ class DeepfakeService:
                 "processing_time_ms": processing_time,
                 "model_version": self.model_version,
                 "device": str(self.device),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": _fast_iso(finished_at)
             }
             
         except Exception as e:
@@ -325,11 +326,15 @@ class DeepfakeService:
         
         frame_idx = 0
         while cap.isOpened() and len(frames) < max_frames:
-            ret, frame = cap.read()
-            if not ret:
+            # Advance without retrieving; only sampled frames are decoded into images
+            if not cap.grab():
                 break
             
             if frame_idx % interval == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                
                 # Convert BGR to RGB
                 frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 frames.append(frame_rgb)
@@ -358,11 +363,15 @@ class DeepfakeService:
     def _decode_image(self, image_data: str) -> np.ndarray:
         """Decode base64 image to numpy array."""
         if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
+            image_data = image_data.split(',', 1)[1]
         
         image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+        
+        # imdecode yields BGR directly from a zero-copy view of the decoded bytes
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("Could not decode image data")
+        return image
     
     def _create_error_response(self, error_message: str, start_time: float) -> Dict[str, Any]:
         """Create standardized error response."""
@@ -388,4 +397,16 @@ class DeepfakeService:
             "supported_formats": ["mp4", "avi", "mov", "jpg", "jpeg", "png"],
             "max_file_size": "100MB",
             "recommended_resolution": "720p minimum for video"
-        }
\ No newline at end of file
+        }
+
+
+# Global singleton instance, created on first use so torch and the model
+# are only loaded once a deepfake endpoint is actually called
+_deepfake_service = None
+
+def get_deepfake_service() -> DeepfakeService:
+    """Get or create the global deepfake detection service instance"""
+    global _deepfake_service
+    if _deepfake_service is None:
+        _deepfake_service = DeepfakeService()
+    return _deepfake_service
@@ -18,43 +18,89 @@ logger = logging.getLogger(__name__)
 class DocumentExtractor:
     """Extract structured data from OCR text for Indian identity documents"""
     
-    # Regex patterns for Indian documents
+    # Regex patterns for Indian documents (compiled once at class creation)
     # Enhanced Aadhaar patterns - EXACT format first (most reliable)
-    AADHAAR_EXACT_PATTERN = r'\b\d{4}\s\d{4}\s\d{4}\b'  # XXXX XXXX XXXX (exact)
-    AADHAAR_PATTERN = r'\b\d{4}[\s\-]?\d{4}[\s\-]?\d{4}\b'  # With separators
-    AADHAAR_CONTINUOUS = r'\b(\d{12})\b'  # Continuous 12 digits
+    AADHAAR_EXACT_PATTERN = re.compile(r'\b\d{4}\s\d{4}\s\d{4}\b')  # XXXX XXXX XXXX (exact)
+    AADHAAR_PATTERN = re.compile(r'\b\d{4}[\s\-]?\d{4}[\s\-]?\d{4}\b', re.IGNORECASE)  # With separators
+    AADHAAR_CONTINUOUS = re.compile(r'\b(\d{12})\b')  # Continuous 12 digits
     # Alternative Aadhaar patterns
-    AADHAAR_ALT_PATTERN = r'(?:BSOPH)?(\d{4})[\s\-]?(\d{4})[\s\-]?(\d{4})'
+    AADHAAR_ALT_PATTERN = re.compile(r'(?:BSOPH)?(\d{4})[\s\-]?(\d{4})[\s\-]?(\d{4})', re.IGNORECASE)
     
-    PAN_PATTERN = r'\b[A-Z]{5}\d{4}[A-Z]\b'
+    PAN_PATTERN = re.compile(r'\b[A-Z]{5}\d{4}[A-Z]\b')
     # Enhanced PAN with word boundaries to avoid false matches
-    PAN_STRICT_PATTERN = r'(?<![A-Z0-9])[A-Z]{5}\d{4}[A-Z](?![A-Z0-9])'
+    PAN_STRICT_PATTERN = re.compile(r'(?<![A-Z0-9])[A-Z]{5}\d{4}[A-Z](?![A-Z0-9])')
+    # Card ID printed on PAN cards (format like BSOPH1631)
+    PAN_CARD_ID_PATTERN = re.compile(r'\b([A-Z]{5}\d{4})\b')
     
-    DL_PATTERN = r'\b[A-Z]{2}[-\s]?\d{2}[-\s]?\d{4}[-\s]?\d{7}\b'
+    DL_PATTERN = re.compile(r'\b[A-Z]{2}[-\s]?\d{2}[-\s]?\d{4}[-\s]?\d{7}\b')
     
     # VID Pattern (16 digits in XXXX XXXX XXXX XXXX format)
-    VID_PATTERN = r'\b\d{4}\s\d{4}\s\d{4}\s\d{4}\b'
+    VID_PATTERN = re.compile(r'\b\d{4}\s\d{4}\s\d{4}\s\d{4}\b')
     
     # Date patterns - enhanced for various formats
-    DATE_PATTERNS = [
+    DATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
         r'\b(\d{2})[/-](\d{2})[/-](\d{4})\b',  # DD/MM/YYYY or DD-MM-YYYY
         r'\b(\d{2})\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+(\d{4})\b',  # DD Mon YYYY
         r'\b(\d{4})[/-](\d{2})[/-](\d{2})\b',  # YYYY/MM/DD or YYYY-MM-DD
         r'\b(\d{2})[/-](\d{2})[/-](\d{2})\b',  # DD/MM/YY
+    )]
+    
+    # Labelled date-of-birth patterns shared by Aadhaar and PAN cards
+    DOB_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+        r'(?:DOB|D\.O\.B|Date of Birth|Birth|जन्म तिथि)\s*[:=]?\s*(\d{2}[/-]\d{2}[/-]\d{4})',
+        r'(?:DOB|D\.O\.B|Date of Birth|Birth)\s*[:=]?\s*(\d{2}\s+[A-Za-z]+\s+\d{4})',
+        r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b',  # Any date pattern
+    )]
+    DL_DOB_PATTERNS = [
+        re.compile(r'(?:DOB|Date of Birth|Birth)\s*[:=]?\s*(\d{2}[/-]\d{2}[/-]\d{4})', re.IGNORECASE),
     ]
     
     # Name patterns - enhanced for Indian names
-    NAME_PATTERNS = [
+    NAME_PATTERNS = [re.compile(p, re.MULTILINE | re.IGNORECASE) for p in (
         r'(?:Name|NAME|नाम)\s*[:=]?\s*([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){1,3})',
         r'^([A-Z][A-Z\s]{5,}?)(?=\n)',  # All caps name at start
         r'([A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)?)',  # Title case names
+    )]
+    PAN_NAME_PATTERNS = [re.compile(p, re.MULTILINE | re.IGNORECASE) for p in (
+        r'(?:Name|NAME|नाम)\s*[:=]?\s*([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){1,3})',
+        r'([A-Z][A-Z\s]{5,}?)(?=\s*(?:Father|पिता|FATHER))',  # Name before "Father"
+        r'([A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)?)',  # Title case names
+    )]
+    DL_NAME_PATTERNS = [
+        re.compile(r'(?:Name|NAME)\s*[:=]?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'),
     ]
     
     # Father's name patterns
-    FATHER_NAME_PATTERNS = [
+    FATHER_NAME_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
         r"(?:Father'?s?\s+Name|FATHER'?S?\s+NAME|पिता का नाम)\s*[:=]?\s*([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){1,3})",
         r'(?:S/O|s/o|Son of)\s*[:=]?\s*([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){1,3})',
-    ]
+    )]
+    
+    GENDER_PATTERN = re.compile(r'\b(MALE|FEMALE|M|F|पुरुष|महिला)\b', re.IGNORECASE)
+    BLOOD_GROUP_PATTERN = re.compile(r'\b([ABO]|AB)[+-]\b')
+    
+    # Generic document number patterns
+    GENERIC_DOC_PATTERNS = [re.compile(p) for p in (
+        r'\b([A-Z]\d{7,8})\b',  # Passport format (A1234567)
+        r'\b([A-Z]{2}\d{6,8})\b',  # Various ID formats
+        r'\b([A-Z]{3}\d{7})\b',  # Voter ID format (ABC1234567)
+        r'\b(\d{8,16})\b',  # Generic numeric IDs
+        r'\b([A-Z0-9]{8,20})\b',  # Alphanumeric IDs
+    )]
+    
+    # Date normalization patterns (anchored at start, used with .match)
+    NUMERIC_DMY_PATTERN = re.compile(r'(\d{2})[/-](\d{2})[/-](\d{4})')
+    TEXT_MONTH_PATTERN = re.compile(r'(\d{2})\s+([A-Za-z]+)\s+(\d{4})')
+    NUMERIC_YMD_PATTERN = re.compile(r'(\d{4})[/-](\d{2})[/-](\d{2})')
+    
+    # Dedicated extractor method per document type
+    EXTRACTORS = {
+        "AADHAAR": "extract_aadhaar",
+        "PAN_CARD": "extract_pan",
+        "DRIVERS_LICENSE": "extract_driving_license",
+    }
+    # Document types handled by extract_generic_id
+    GENERIC_DOC_TYPES = frozenset({"PASSPORT", "NATIONAL_ID", "VOTER_ID"})
     
     def __init__(self):
         """Initialize document extractor"""
@@ -100,28 +146,28 @@ class DocumentExtractor:
             aadhaar = None
             
             # Priority 1: Exact format with spaces (XXXX XXXX XXXX) - most reliable
-            exact_match = re.search(self.AADHAAR_EXACT_PATTERN, text_clean)
+            exact_match = self.AADHAAR_EXACT_PATTERN.search(text_clean)
             if exact_match:
                 aadhaar = exact_match.group().replace(' ', '')
                 logger.info(f"[EXTRACTOR] Aadhaar found (exact format): ****{aadhaar[-4:]}")
             
             # Priority 2: With separators (dashes or spaces)
             if not aadhaar:
-                sep_match = re.search(self.AADHAAR_PATTERN, text_clean, re.IGNORECASE)
+                sep_match = self.AADHAAR_PATTERN.search(text_clean)
                 if sep_match:
                     aadhaar = sep_match.group().replace(' ', '').replace('-', '')
                     logger.info(f"[EXTRACTOR] Aadhaar found (with separators): ****{aadhaar[-4:]}")
             
             # Priority 3: Alternative pattern (BSOPH prefix sometimes appears)
             if not aadhaar:
-                alt_match = re.search(self.AADHAAR_ALT_PATTERN, text_clean, re.IGNORECASE)
+                alt_match = self.AADHAAR_ALT_PATTERN.search(text_clean)
                 if alt_match:
                     aadhaar = alt_match.group(1) + alt_match.group(2) + alt_match.group(3)
                     logger.info(f"[EXTRACTOR] Aadhaar found (alternative pattern): ****{aadhaar[-4:]}")
             
             # Priority 4: Continuous 12 digits
             if not aadhaar:
-                cont_match = re.search(self.AADHAAR_CONTINUOUS, text_clean)
+                cont_match = self.AADHAAR_CONTINUOUS.search(text_clean)
                 if cont_match:
                     aadhaar = cont_match.group(1)
                     logger.info(f"[EXTRACTOR] Aadhaar found (continuous digits): ****{aadhaar[-4:]}")
@@ -135,7 +181,7 @@ class DocumentExtractor:
                 logger.warning(f"[EXTRACTOR] ✗ No valid Aadhaar number found in text")
             
             # Extract VID (Virtual ID) - 16 digits in XXXX XXXX XXXX XXXX format
-            vid_match = re.search(self.VID_PATTERN, text_clean)
+            vid_match = self.VID_PATTERN.search(text_clean)
             if vid_match:
                 vid = vid_match.group().replace(' ', '')
                 if len(vid) == 16 and vid.isdigit():
@@ -146,7 +192,7 @@ class DocumentExtractor:
             # Extract name - Try multiple patterns
             name_found = False
             for pattern in self.NAME_PATTERNS:
-                name_match = re.search(pattern, text, re.MULTILINE | re.IGNORECASE)
+                name_match = pattern.search(text)
                 if name_match:
                     name = name_match.group(1).strip()
                     # Validate name (at least 2 words, no digits, reasonable length)
@@ -161,7 +207,7 @@ class DocumentExtractor:
             
             # Extract father's name
             for pattern in self.FATHER_NAME_PATTERNS:
-                father_match = re.search(pattern, text, re.IGNORECASE)
+                father_match = pattern.search(text)
                 if father_match:
                     father_name = father_match.group(1).strip()
                     if len(father_name) > 5 and not any(char.isdigit() for char in father_name):
@@ -171,14 +217,8 @@ class DocumentExtractor:
                         break
             
             # Extract DOB - Enhanced patterns
-            dob_patterns = [
-                r'(?:DOB|D\.O\.B|Date of Birth|Birth|जन्म तिथि)\s*[:=]?\s*(\d{2}[/-]\d{2}[/-]\d{4})',
-                r'(?:DOB|D\.O\.B|Date of Birth|Birth)\s*[:=]?\s*(\d{2}\s+[A-Za-z]+\s+\d{4})',
-                r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b',  # Any date pattern
-            ]
-            
-            for pattern in dob_patterns:
-                dob_match = re.search(pattern, text, re.IGNORECASE)
+            for pattern in self.DOB_PATTERNS:
+                dob_match = pattern.search(text)
                 if dob_match:
                     dob = self._normalize_date(dob_match.group(1))
                     if dob and self._is_valid_dob(dob):
@@ -188,7 +228,7 @@ class DocumentExtractor:
                         break
             
             # Extract gender
-            gender_match = re.search(r'\b(MALE|FEMALE|M|F|पुरुष|महिला)\b', text, re.IGNORECASE)
+            gender_match = self.GENDER_PATTERN.search(text)
             if gender_match:
                 gender = gender_match.group(1).upper()
                 gender = 'MALE' if gender in ['MALE', 'M', 'पुरुष'] else 'FEMALE'
@@ -245,10 +285,10 @@ class DocumentExtractor:
             text_upper = text_clean.upper()
             
             # Try strict pattern first (most reliable)
-            pan_match = re.search(self.PAN_STRICT_PATTERN, text_upper)
+            pan_match = self.PAN_STRICT_PATTERN.search(text_upper)
             if not pan_match:
                 # Fallback to regular pattern
-                pan_match = re.search(self.PAN_PATTERN, text_upper)
+                pan_match = self.PAN_PATTERN.search(text_upper)
             
             if pan_match:
                 pan = pan_match.group().upper().strip()
@@ -264,8 +304,7 @@ class DocumentExtractor:
                     logger.warning(f"[EXTRACTOR] Invalid PAN format: {pan}")
             
             # Extract Card ID (visible on card, format like BSOPH1631)
-            card_id_pattern = r'\b([A-Z]{5}\d{4})\b'
-            card_id_match = re.search(card_id_pattern, text_clean)
+            card_id_match = self.PAN_CARD_ID_PATTERN.search(text_clean)
             if card_id_match:
                 card_id = card_id_match.group(1)
                 # Make sure it's not the PAN number itself
@@ -274,14 +313,8 @@ class DocumentExtractor:
                     logger.info(f"[EXTRACTOR] Card ID found: {card_id}")
             
             # Extract name - Enhanced for PAN card format
-            name_patterns = [
-                r'(?:Name|NAME|नाम)\s*[:=]?\s*([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){1,3})',
-                r'([A-Z][A-Z\s]{5,}?)(?=\s*(?:Father|पिता|FATHER))',  # Name before "Father"
-                r'([A-Z][A-Za-z]+\s+[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)?)',  # Title case names
-            ]
-            
-            for pattern in name_patterns:
-                name_match = re.search(pattern, text, re.MULTILINE | re.IGNORECASE)
+            for pattern in self.PAN_NAME_PATTERNS:
+                name_match = pattern.search(text)
                 if name_match:
                     name = name_match.group(1).strip()
                     # Validate name - filter out common text on cards
@@ -298,7 +331,7 @@ class DocumentExtractor:
             
             # Extract father's name - Use enhanced patterns from class
             for pattern in self.FATHER_NAME_PATTERNS:
-                father_match = re.search(pattern, text, re.IGNORECASE)
+                father_match = pattern.search(text)
                 if father_match:
                     father_name = father_match.group(1).strip()
                     if (len(father_name) > 5 and 
@@ -310,14 +343,8 @@ class DocumentExtractor:
                         break
             
             # Extract DOB - Enhanced patterns
-            dob_patterns = [
-                r'(?:DOB|D\.O\.B|Date of Birth|Birth|जन्म तिथि)\s*[:=]?\s*(\d{2}[/-]\d{2}[/-]\d{4})',
-                r'(?:DOB|D\.O\.B|Date of Birth|Birth)\s*[:=]?\s*(\d{2}\s+[A-Za-z]+\s+\d{4})',
-                r'\b(\d{2}[/-]\d{2}[/-]\d{4})\b',
-            ]
-            
-            for pattern in dob_patterns:
-                dob_match = re.search(pattern, text, re.IGNORECASE)
+            for pattern in self.DOB_PATTERNS:
+                dob_match = pattern.search(text)
                 if dob_match:
                     dob = self._normalize_date(dob_match.group(1))
                     if dob and self._is_valid_dob(dob):
@@ -374,7 +401,7 @@ class DocumentExtractor:
         
         try:
             # Extract DL number (Format: XX-YYZZZZZZZZZZ or variations)
-            dl_match = re.search(self.DL_PATTERN, text)
+            dl_match = self.DL_PATTERN.search(text)
             if dl_match:
                 dl_number = dl_match.group().replace(' ', '').replace('-', '')
                 result["licenseNumber"] = dl_number
@@ -382,12 +409,8 @@ class DocumentExtractor:
                 logger.info(f"[EXTRACTOR] DL number found: {dl_number}")
             
             # Extract name
-            name_patterns = [
-                r'(?:Name|NAME)\s*[:=]?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            ]
-            
-            for pattern in name_patterns:
-                name_match = re.search(pattern, text)
+            for pattern in self.DL_NAME_PATTERNS:
+                name_match = pattern.search(text)
                 if name_match:
                     name = name_match.group(1).strip()
                     if len(name) > 3:
@@ -397,12 +420,8 @@ class DocumentExtractor:
                         break
             
             # Extract DOB
-            dob_patterns = [
-                r'(?:DOB|Date of Birth|Birth)\s*[:=]?\s*(\d{2}[/-]\d{2}[/-]\d{4})',
-            ]
-            
-            for pattern in dob_patterns:
-                dob_match = re.search(pattern, text, re.IGNORECASE)
+            for pattern in self.DL_DOB_PATTERNS:
+                dob_match = pattern.search(text)
                 if dob_match:
                     dob = self._normalize_date(dob_match.group(1))
                     if dob:
@@ -412,7 +431,7 @@ class DocumentExtractor:
                         break
             
             # Extract blood group
-            blood_match = re.search(r'\b([ABO]|AB)[+-]\b', text)
+            blood_match = self.BLOOD_GROUP_PATTERN.search(text)
             if blood_match:
                 blood_group = blood_match.group()
                 result["bloodGroup"] = blood_group
@@ -468,13 +487,13 @@ class DocumentExtractor:
         """
         try:
             # Try DD/MM/YYYY or DD-MM-YYYY
-            match = re.match(r'(\d{2})[/-](\d{2})[/-](\d{4})', date_str)
+            match = self.NUMERIC_DMY_PATTERN.match(date_str)
             if match:
                 day, month, year = match.groups()
                 return f"{year}-{month}-{day}"
             
             # Try DD Mon YYYY
-            match = re.match(r'(\d{2})\s+([A-Za-z]+)\s+(\d{4})', date_str)
+            match = self.TEXT_MONTH_PATTERN.match(date_str)
             if match:
                 day, month_name, year = match.groups()
                 month = self.month_map.get(month_name[:3].lower())
@@ -482,7 +501,7 @@ class DocumentExtractor:
                     return f"{year}-{month}-{day}"
             
             # Try YYYY/MM/DD or YYYY-MM-DD
-            match = re.match(r'(\d{4})[/-](\d{2})[/-](\d{2})', date_str)
+            match = self.NUMERIC_YMD_PATTERN.match(date_str)
             if match:
                 year, month, day = match.groups()
                 return f"{year}-{month}-{day}"
@@ -506,17 +525,13 @@ class DocumentExtractor:
         """
         logger.info(f"[EXTRACTOR] Processing document type: {document_type}")
         
-        if document_type == "AADHAAR":
-            return self.extract_aadhaar(text, ocr_data)
-        elif document_type == "PAN_CARD":
-            return self.extract_pan(text, ocr_data)
-        elif document_type == "DRIVERS_LICENSE":
-            return self.extract_driving_license(text, ocr_data)
-        elif document_type in ["PASSPORT", "NATIONAL_ID", "VOTER_ID"]:
-            return self.extract_generic_id(document_type, text, ocr_data)
-        else:
+        method_name = self.EXTRACTORS.get(document_type)
+        if method_name is not None:
+            return getattr(self, method_name)(text, ocr_data)
+        
+        if document_type not in self.GENERIC_DOC_TYPES:
             logger.warning(f"[EXTRACTOR] Unknown document type: {document_type}, using generic extraction")
-            return self.extract_generic_id(document_type, text, ocr_data)
+        return self.extract_generic_id(document_type, text, ocr_data)
     
     def extract_generic_id(self, document_type: str, text: str, ocr_data: List[Any]) -> Dict[str, Any]:
         """
@@ -546,16 +561,8 @@ class DocumentExtractor:
             text_clean = ' '.join(text.split())
             
             # Generic document number patterns
-            doc_patterns = [
-                r'\b([A-Z]\d{7,8})\b',  # Passport format (A1234567)
-                r'\b([A-Z]{2}\d{6,8})\b',  # Various ID formats
-                r'\b([A-Z]{3}\d{7})\b',  # Voter ID format (ABC1234567)
-                r'\b(\d{8,16})\b',  # Generic numeric IDs
-                r'\b([A-Z0-9]{8,20})\b',  # Alphanumeric IDs
-            ]
-            
-            for pattern in doc_patterns:
-                match = re.search(pattern, text_clean)
+            for pattern in self.GENERIC_DOC_PATTERNS:
+                match = pattern.search(text_clean)
                 if match:
                     doc_num = match.group(1)
                     # Filter out common false positives
@@ -568,7 +575,7 @@ class DocumentExtractor:
             
             # Extract name - use existing patterns
             for pattern in self.NAME_PATTERNS:
-                name_match = re.search(pattern, text, re.MULTILINE | re.IGNORECASE)
+                name_match = pattern.search(text)
                 if name_match:
                     name = name_match.group(1).strip()
                     if (len(name) > 5 and len(name) < 100 and 
@@ -581,7 +588,7 @@ class DocumentExtractor:
             
             # Extract DOB
             for pattern in self.DATE_PATTERNS:
-                dob_match = re.search(pattern, text, re.IGNORECASE)
+                dob_match = pattern.search(text)
                 if dob_match:
                     date_text = dob_match.group()
                     dob = self._normalize_date(date_text)
@@ -607,3 +614,4 @@ class DocumentExtractor:
             logger.error(f"[EXTRACTOR] Generic ID extraction failed: {str(e)}")
         
         return result
+
@@ -7,10 +7,12 @@ face matching, liveness detection, and decision making.
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import uuid
 
+import orjson
+
 from src.schemas.ekyc import (
     EkycStatusEnum,
     EkycDecisionEnum,
@@ -19,6 +21,22 @@ from src.schemas.ekyc import (
 
 logger = logging.getLogger(__name__)
 
+# Session columns plus its documents and results aggregated as JSON arrays,
+# so a session (or a whole page of them) is hydrated in a single query
+_SESSION_WITH_CHILDREN = '''
+    s.*,
+    COALESCE((SELECT json_agg(d) FROM "ekyc_documents" d WHERE d."sessionId" = s.id), '[]') AS documents,
+    COALESCE((SELECT json_agg(r) FROM "ekyc_results" r WHERE r."sessionId" = s.id), '[]') AS results
+'''
+
+
+def _hydrate_session(row) -> Dict[str, Any]:
+    """Turn a row selected with _SESSION_WITH_CHILDREN into a session dict"""
+    session = dict(row)
+    session['documents'] = orjson.loads(session['documents'])
+    session['results'] = orjson.loads(session['results'])
+    return session
+
 
 class EkycService:
     """Service for e-KYC verification operations"""
@@ -49,18 +67,15 @@ class EkycService:
                     '''
                     INSERT INTO "ekyc_sessions" 
                     (id, "userId", "sessionId", status, decision, "ipAddress", "userAgent", "createdAt", "updatedAt")
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                    VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, NOW(), NOW())
                     RETURNING *
                     ''',
-                    str(uuid.uuid4()),
                     user_id,
                     session_id,
                     EkycStatusEnum.PENDING,
                     EkycDecisionEnum.PENDING,
                     ip_address,
-                    user_agent,
-                    datetime.utcnow(),
-                    datetime.utcnow()
+                    user_agent
                 )
                 
                 session = dict(result)
@@ -95,27 +110,24 @@ class EkycService:
                     '''
                     INSERT INTO "ekyc_documents" 
                     (id, "sessionId", type, "frontImageUrl", "backImageUrl", "tamperingDetected", "uploadedAt")
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, NOW())
                     RETURNING *
                     ''',
-                    str(uuid.uuid4()),
                     session_id,
                     document_type,
                     front_image_url,
                     back_image_url,
-                    False,
-                    datetime.utcnow()
+                    False
                 )
                 
                 # Update session status
                 await conn.execute(
                     '''
                     UPDATE "ekyc_sessions" 
-                    SET status = $1, "updatedAt" = $2 
-                    WHERE id = $3
+                    SET status = $1, "updatedAt" = NOW() 
+                    WHERE id = $2
                     ''',
                     EkycStatusEnum.DOCUMENT_UPLOADED,
-                    datetime.utcnow(),
                     session_id
                 )
             
@@ -145,12 +157,11 @@ class EkycService:
                 session = await conn.fetchrow(
                     '''
                     UPDATE "ekyc_sessions" 
-                    SET status = $1, "updatedAt" = $2 
-                    WHERE id = $3
+                    SET status = $1, "updatedAt" = NOW() 
+                    WHERE id = $2
                     RETURNING *
                     ''',
                     EkycStatusEnum.SELFIE_UPLOADED,
-                    datetime.utcnow(),
                     session_id
                 )
             
@@ -179,11 +190,10 @@ class EkycService:
                 await conn.execute(
                     '''
                     UPDATE "ekyc_sessions" 
-                    SET status = $1, "updatedAt" = $2 
-                    WHERE id = $3
+                    SET status = $1, "updatedAt" = NOW() 
+                    WHERE id = $2
                     ''',
                     EkycStatusEnum.PROCESSING,
-                    datetime.utcnow(),
                     session_id
                 )
                 
@@ -222,8 +232,8 @@ class EkycService:
                     UPDATE "ekyc_sessions" 
                     SET status = $1, decision = $2, "documentScore" = $3, 
                         "faceMatchScore" = $4, "livenessScore" = $5, "overallScore" = $6,
-                        "completedAt" = $7, "updatedAt" = $8
-                    WHERE id = $9
+                        "completedAt" = NOW(), "updatedAt" = NOW()
+                    WHERE id = $7
                     RETURNING *
                     ''',
                     EkycStatusEnum.COMPLETED,
@@ -232,8 +242,6 @@ class EkycService:
                     face_match_score,
                     liveness_score,
                     overall_score,
-                    datetime.utcnow(),
-                    datetime.utcnow(),
                     session_id
                 )
             
@@ -249,12 +257,11 @@ class EkycService:
                 await conn.execute(
                     '''
                     UPDATE "ekyc_sessions" 
-                    SET status = $1, "rejectionReason" = $2, "updatedAt" = $3
-                    WHERE id = $4
+                    SET status = $1, "rejectionReason" = $2, "updatedAt" = NOW()
+                    WHERE id = $3
                     ''',
                     EkycStatusEnum.FAILED,
                     str(e),
-                    datetime.utcnow(),
                     session_id
                 )
             raise
@@ -278,9 +285,8 @@ class EkycService:
                 '''
                 INSERT INTO "ekyc_results" 
                 (id, "sessionId", "verificationType", score, "isPassed", confidence, details, "modelVersion", "processingTime", "processedAt")
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, NOW())
                 ''',
-                str(uuid.uuid4()),
                 session['id'],
                 'document_auth',
                 score,
@@ -288,8 +294,7 @@ class EkycService:
                 0.95,
                 '{"method": "ml_classifier", "checks": ["hologram", "security_features", "tampering"]}',
                 'v1.0.0',
-                500,
-                datetime.utcnow()
+                500
             )
         
         return score
@@ -309,9 +314,8 @@ class EkycService:
                 '''
                 INSERT INTO "ekyc_results" 
                 (id, "sessionId", "verificationType", score, "isPassed", confidence, details, "modelVersion", "processingTime", "processedAt")
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, NOW())
                 ''',
-                str(uuid.uuid4()),
                 session['id'],
                 'face_match',
                 score,
@@ -319,8 +323,7 @@ class EkycService:
                 0.91,
                 '{"similarity": ' + str(score) + ', "landmarks_matched": 68}',
                 'v1.0.0',
-                500,
-                datetime.utcnow()
+                500
             )
         
         return score
@@ -340,9 +343,8 @@ class EkycService:
                 '''
                 INSERT INTO "ekyc_results" 
                 (id, "sessionId", "verificationType", score, "isPassed", confidence, details, "modelVersion", "processingTime", "processedAt")
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, NOW())
                 ''',
-                str(uuid.uuid4()),
                 session['id'],
                 'liveness',
                 score,
@@ -350,8 +352,7 @@ class EkycService:
                 0.96,
                 '{"method": "depth_analysis", "frames_analyzed": 30}',
                 'v1.0.0',
-                500,
-                datetime.utcnow()
+                500
             )
         
         return score
@@ -513,9 +514,8 @@ class EkycService:
             async with self.db_pool.acquire() as conn:
                 # Update status to processing
                 await conn.execute(
-                    'UPDATE "ekyc_sessions" SET status = $1, "updatedAt" = $2 WHERE "sessionId" = $3',
+                    'UPDATE "ekyc_sessions" SET status = $1, "updatedAt" = NOW() WHERE "sessionId" = $2',
                     EkycStatusEnum.PROCESSING,
-                    datetime.utcnow(),
                     session_id
                 )
                 
@@ -553,16 +553,14 @@ class EkycService:
                     '''UPDATE "ekyc_sessions" 
                        SET status = $1, decision = $2, "documentScore" = $3, 
                            "faceMatchScore" = $4, "livenessScore" = $5, "overallScore" = $6,
-                           "completedAt" = $7, "updatedAt" = $8
-                       WHERE "sessionId" = $9''',
+                           "completedAt" = NOW(), "updatedAt" = NOW()
+                       WHERE "sessionId" = $7''',
                     EkycStatusEnum.COMPLETED,
                     decision,
                     document_score,
                     face_match_score,
                     liveness_score,
                     overall_score,
-                    datetime.utcnow(),
-                    datetime.utcnow(),
                     session_id
                 )
                 
@@ -583,11 +581,10 @@ class EkycService:
             async with self.db_pool.acquire() as conn:
                 await conn.execute(
                     '''UPDATE "ekyc_sessions" 
-                       SET status = $1, "rejectionReason" = $2, "updatedAt" = $3
-                       WHERE "sessionId" = $4''',
+                       SET status = $1, "rejectionReason" = $2, "updatedAt" = NOW()
+                       WHERE "sessionId" = $3''',
                     EkycStatusEnum.FAILED,
                     str(e),
-                    datetime.utcnow(),
                     session_id
                 )
             raise
@@ -611,8 +608,7 @@ class EkycService:
                 '''INSERT INTO "ekyc_results" 
                    (id, "sessionId", "verificationType", score, "isPassed", confidence, 
                     details, "modelVersion", "processingTime", "processedAt")
-                   VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)''',
-                str(uuid.uuid4()),
+                   VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, NOW())''',
                 session["id"],
                 "document_auth",
                 score,
@@ -620,8 +616,7 @@ class EkycService:
                 0.95,
                 '{"method": "ml_classifier", "checks": ["hologram", "security_features", "tampering"]}',
                 "v1.0.0",
-                500,
-                datetime.utcnow()
+                500
             )
         
         return score
@@ -641,8 +636,7 @@ class EkycService:
                 '''INSERT INTO "ekyc_results" 
                    (id, "sessionId", "verificationType", score, "isPassed", confidence, 
                     details, "modelVersion", "processingTime", "processedAt")
-                   VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)''',
-                str(uuid.uuid4()),
+                   VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, NOW())''',
                 session["id"],
                 "face_match",
                 score,
@@ -650,8 +644,7 @@ class EkycService:
                 0.91,
                 '{"similarity": ' + str(score) + ', "landmarks_matched": 68}',
                 "v1.0.0",
-                500,
-                datetime.utcnow()
+                500
             )
         
         return score
@@ -671,8 +664,7 @@ class EkycService:
                 '''INSERT INTO "ekyc_results" 
                    (id, "sessionId", "verificationType", score, "isPassed", confidence, 
                     details, "modelVersion", "processingTime", "processedAt")
-                   VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)''',
-                str(uuid.uuid4()),
+                   VALUES (gen_random_uuid()::text, $1, $2, $3, $4, $5, $6, $7, $8, NOW())''',
                 session["id"],
                 "liveness",
                 score,
@@ -680,8 +672,7 @@ class EkycService:
                 0.96,
                 '{"method": "depth_analysis", "frames_analyzed": 30}',
                 "v1.0.0",
-                500,
-                datetime.utcnow()
+                500
             )
         
         return score
@@ -728,34 +719,34 @@ class EkycService:
         try:
             async with self.db_pool.acquire() as conn:
                 session = await conn.fetchrow(
-                    'SELECT * FROM "ekyc_sessions" WHERE "sessionId" = $1',
+                    f'SELECT {_SESSION_WITH_CHILDREN} FROM "ekyc_sessions" s WHERE s."sessionId" = $1',
                     session_id
                 )
                 
                 if not session:
                     return None
                 
-                session_dict = dict(session)
-                
-                # Fetch documents
-                documents = await conn.fetch(
-                    'SELECT * FROM "ekyc_documents" WHERE "sessionId" = $1',
-                    session_dict['id']
-                )
-                session_dict['documents'] = [dict(d) for d in documents]
-                
-                # Fetch results
-                results = await conn.fetch(
-                    'SELECT * FROM "ekyc_results" WHERE "sessionId" = $1',
-                    session_dict['id']
-                )
-                session_dict['results'] = [dict(r) for r in results]
-                
-                return session_dict
+                return _hydrate_session(session)
         except Exception as e:
             logger.error(f"[EKYC] Failed to fetch session: {str(e)}")
             return None
 
+    async def get_session_id(self, session_id: str) -> Optional[str]:
+        """
+        Resolve a public e-KYC session ID to its internal DB ID
+        
+        Args:
+            session_id: E-KYC session ID
+            
+        Returns:
+            Internal session ID, or None if the session does not exist
+        """
+        async with self.db_pool.acquire() as conn:
+            return await conn.fetchval(
+                'SELECT id FROM "ekyc_sessions" WHERE "sessionId" = $1',
+                session_id
+            )
+
     async def get_user_sessions(self, user_id: str, skip: int = 0, 
                               take: int = 20) -> List[Dict[str, Any]]:
         """
@@ -767,20 +758,22 @@ class EkycService:
             take: Number of records to take
             
         Returns:
-            List of sessions
+            List of sessions with their documents and results
         """
         try:
-            sessions = await self.db.ekycsession.find_many({
-                "where": {"userId": user_id},
-                "include": {
-                    "documents": True,
-                    "results": True,
-                },
-                "orderBy": {"createdAt": "desc"},
-                "skip": skip,
-                "take": take,
-            })
-            return sessions
+            async with self.db_pool.acquire() as conn:
+                sessions = await conn.fetch(
+                    f'''
+                    SELECT {_SESSION_WITH_CHILDREN} FROM "ekyc_sessions" s 
+                    WHERE s."userId" = $1 
+                    ORDER BY s."createdAt" DESC, s.id DESC 
+                    OFFSET $2 LIMIT $3
+                    ''',
+                    user_id,
+                    skip,
+                    take
+                )
+                return [_hydrate_session(session) for session in sessions]
         except Exception as e:
             logger.error(f"[EKYC] Failed to fetch user sessions: {str(e)}")
             return []
@@ -796,10 +789,57 @@ class EkycService:
             Total count
         """
         try:
-            count = await self.db.ekycsession.count({
-                "where": {"userId": user_id}
-            })
-            return count
+            async with self.db_pool.acquire() as conn:
+                count = await conn.fetchval(
+                    'SELECT COUNT(*) FROM "ekyc_sessions" WHERE "userId" = $1',
+                    user_id
+                )
+                return count or 0
         except Exception as e:
             logger.error(f"[EKYC] Failed to count user sessions: {str(e)}")
             return 0
+
+    async def get_user_sessions_after(self, user_id: str, cursor: Optional[Tuple[datetime, str]] = None,
+                                      take: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get a page of e-KYC sessions for a user using keyset pagination
+        
+        Args:
+            user_id: User ID
+            cursor: (createdAt, id) of the last session on the previous page
+            take: Number of records to take
+            
+        Returns:
+            List of sessions ordered by newest first
+        """
+        try:
+            async with self.db_pool.acquire() as conn:
+                if cursor:
+                    sessions = await conn.fetch(
+                        f'''
+                        SELECT {_SESSION_WITH_CHILDREN} FROM "ekyc_sessions" s 
+                        WHERE s."userId" = $1 AND (s."createdAt", s.id) < ($2, $3)
+                        ORDER BY s."createdAt" DESC, s.id DESC 
+                        LIMIT $4
+                        ''',
+                        user_id,
+                        cursor[0],
+                        cursor[1],
+                        take
+                    )
+                else:
+                    sessions = await conn.fetch(
+                        f'''
+                        SELECT {_SESSION_WITH_CHILDREN} FROM "ekyc_sessions" s 
+                        WHERE s."userId" = $1 
+                        ORDER BY s."createdAt" DESC, s.id DESC 
+                        LIMIT $2
+                        ''',
+                        user_id,
+                        take
+                    )
+                
+                return [_hydrate_session(session) for session in sessions]
+        except Exception as e:
+            logger.error(f"[EKYC] Failed to fetch user sessions: {str(e)}")
+            return []
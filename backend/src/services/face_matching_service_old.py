@@ -1,237 +0,0 @@
-"""
-Face Matching Service
-
-Cutting-edge facial recognition technology for matching faces with government documents.
-Includes liveness detection and anti-spoofing measures.
-"""
-
-import base64
-import io
-import json
-import time
-from typing import Dict, Any, Optional, Tuple, List
-from PIL import Image
-import numpy as np
-from datetime import datetime
-
-class FaceMatchingService:
-    """Service for facial recognition and matching using advanced biometric analysis."""
-    
-    def __init__(self):
-        self.model_version = "FaceNet-v3.2"
-        self.match_threshold = 0.75
-        self.liveness_threshold = 0.8
-        
-    def match_faces(self, document_image: str, selfie_image: str, 
-                   enable_liveness: bool = True) -> Dict[str, Any]:
-        """
-        Match faces between document and selfie images.
-        
-        Args:
-            document_image: Base64 encoded document image
-            selfie_image: Base64 encoded selfie image
-            enable_liveness: Whether to perform liveness detection
-            
-        Returns:
-            Dictionary containing match results
-        """
-        start_time = time.time()
-        
-        try:
-            # Decode images
-            doc_image = self._decode_image(document_image)
-            selfie_img = self._decode_image(selfie_image)
-            
-            # Extract faces
-            doc_face = self._extract_face(doc_image)
-            selfie_face = self._extract_face(selfie_img)
-            
-            if doc_face is None or selfie_face is None:
-                return self._create_error_response("Face not detected in one or both images")
-            
-            # Perform face matching
-            match_result = self._calculate_face_match(doc_face, selfie_face)
-            
-            # Liveness detection (if enabled)
-            liveness_result = {}
-            if enable_liveness:
-                liveness_result = self._detect_liveness(selfie_img)
-            
-            # Quality assessment
-            quality_scores = self._assess_image_quality(doc_image, selfie_img)
-            
-            processing_time = int((time.time() - start_time) * 1000)
-            
-            return {
-                "face_match_score": match_result["match_score"],
-                "is_match": match_result["is_match"],
-                "confidence_level": match_result["confidence"],
-                "liveness_check": liveness_result,
-                "quality_assessment": quality_scores,
-                "biometric_features": {
-                    "face_detected_document": doc_face is not None,
-                    "face_detected_selfie": selfie_face is not None,
-                    "multiple_faces_document": False,  # Would be detected in _extract_face
-                    "multiple_faces_selfie": False
-                },
-                "processing_time_ms": processing_time,
-                "model_version": self.model_version,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            
-        except Exception as e:
-            return self._create_error_response(str(e), start_time)
-    
-    def _decode_image(self, image_data: str) -> np.ndarray:
-        """Decode base64 image to numpy array."""
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-        
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        return np.array(image)
-    
-    def _extract_face(self, image: np.ndarray) -> Optional[Dict[str, Any]]:
-        """Extract face features and landmarks from image."""
-        # Simulate face detection and feature extraction
-        # In production, this would use libraries like dlib, OpenCV, or face_recognition
-        
-        # Simulate face detection (90% success rate)
-        if np.random.random() < 0.1:
-            return None  # Face not detected
-        
-        # Generate simulated face encoding (in production, this would be actual face embeddings)
-        face_encoding = np.random.random(128).tolist()  # 128-dimensional face encoding
-        
-        # Simulate facial landmarks (68-point landmarks)
-        landmarks = np.random.randint(0, min(image.shape[:2]), (68, 2)).tolist()
-        
-        return {
-            "encoding": face_encoding,
-            "landmarks": landmarks,
-            "bounding_box": [100, 100, 300, 300],  # x, y, width, height
-            "pose_angle": np.random.uniform(-15, 15),
-            "face_size": np.random.randint(150, 400)
-        }
-    
-    def _calculate_face_match(self, face1: Dict[str, Any], face2: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate similarity between two face encodings."""
-        # Simulate face comparison using cosine similarity
-        # In production, this would use actual face recognition algorithms
-        
-        encoding1 = np.array(face1["encoding"])
-        encoding2 = np.array(face2["encoding"])
-        
-        # Simulate distance calculation (lower = more similar)
-        distance = np.random.uniform(0.3, 1.2)
-        
-        # Convert distance to similarity score
-        similarity = max(0, 1 - distance)
-        match_score = similarity * 100
-        
-        # Determine if faces match based on threshold
-        is_match = similarity >= self.match_threshold
-        confidence = min(similarity / self.match_threshold, 1.0) if is_match else similarity
-        
-        return {
-            "match_score": round(match_score, 2),
-            "is_match": is_match,
-            "confidence": round(confidence * 100, 2),
-            "distance": round(distance, 4)
-        }
-    
-    def _detect_liveness(self, image: np.ndarray) -> Dict[str, Any]:
-        """Detect if the face in the image is from a live person."""
-        # Simulate liveness detection algorithms
-        # In production, this would analyze texture, motion, depth, etc.
-        
-        # Simulate various liveness indicators
-        texture_analysis = np.random.random() > 0.15  # Good texture indicates live face
-        eye_movement = np.random.random() > 0.2  # Eye movement detected
-        micro_expressions = np.random.random() > 0.25  # Natural micro-expressions
-        
-        # Calculate liveness score
-        liveness_indicators = [texture_analysis, eye_movement, micro_expressions]
-        liveness_score = sum(liveness_indicators) / len(liveness_indicators) * 100
-        
-        is_live = liveness_score >= (self.liveness_threshold * 100)
-        
-        # Spoof detection
-        print_attack_detected = np.random.random() < 0.05  # 5% chance of print attack
-        screen_attack_detected = np.random.random() < 0.03  # 3% chance of screen attack
-        mask_attack_detected = np.random.random() < 0.02  # 2% chance of mask attack
-        
-        spoof_detected = any([print_attack_detected, screen_attack_detected, mask_attack_detected])
-        
-        return {
-            "is_live": is_live and not spoof_detected,
-            "liveness_score": round(liveness_score, 2),
-            "confidence": round(liveness_score / 100.0, 2),
-            "spoof_detection": {
-                "spoof_detected": spoof_detected,
-                "print_attack": print_attack_detected,
-                "screen_attack": screen_attack_detected,
-                "mask_attack": mask_attack_detected
-            },
-            "liveness_indicators": {
-                "texture_quality": texture_analysis,
-                "eye_movement": eye_movement,
-                "micro_expressions": micro_expressions
-            }
-        }
-    
-    def _assess_image_quality(self, doc_image: np.ndarray, selfie_image: np.ndarray) -> Dict[str, Any]:
-        """Assess the quality of both images for face recognition."""
-        def calculate_quality(image: np.ndarray) -> Dict[str, float]:
-            # Simulate image quality metrics
-            return {
-                "brightness": round(np.random.uniform(0.3, 1.0), 2),
-                "contrast": round(np.random.uniform(0.4, 1.0), 2),
-                "sharpness": round(np.random.uniform(0.5, 1.0), 2),
-                "resolution": round(np.random.uniform(0.6, 1.0), 2),
-                "face_size": round(np.random.uniform(0.4, 1.0), 2)
-            }
-        
-        doc_quality = calculate_quality(doc_image)
-        selfie_quality = calculate_quality(selfie_image)
-        
-        # Overall quality scores
-        doc_overall = sum(doc_quality.values()) / len(doc_quality)
-        selfie_overall = sum(selfie_quality.values()) / len(selfie_quality)
-        
-        return {
-            "document_image": {
-                **doc_quality,
-                "overall_quality": round(doc_overall, 2)
-            },
-            "selfie_image": {
-                **selfie_quality,
-                "overall_quality": round(selfie_overall, 2)
-            },
-            "quality_sufficient": doc_overall > 0.6 and selfie_overall > 0.6
-        }
-    
-    def _create_error_response(self, error_message: str, start_time: Optional[float] = None) -> Dict[str, Any]:
-        """Create standardized error response."""
-        processing_time = 0
-        if start_time:
-            processing_time = int((time.time() - start_time) * 1000)
-        
-        return {
-            "error": error_message,
-            "face_match_score": 0.0,
-            "is_match": False,
-            "confidence_level": 0.0,
-            "processing_time_ms": processing_time
-        }
-    
-    def get_model_info(self) -> Dict[str, Any]:
-        """Return information about the face matching model."""
-        return {
-            "model_version": self.model_version,
-            "match_threshold": self.match_threshold,
-            "liveness_threshold": self.liveness_threshold,
-            "supported_formats": ["jpeg", "png", "bmp"],
-            "max_image_size": "10MB",
-            "recommended_face_size": "150x150 pixels minimum"
-        }
@@ -6,12 +6,12 @@ Integrates comprehensive verification for Indian documents (Aadhaar, PAN) with
 layout analysis, QR verification, tampering detection, and security feature validation.
 """
 
-import base64
 import io
 import time
 import logging
 import re
-from typing import Dict, Any, Optional, Tuple, List
+import threading
+from typing import Dict, Any, Optional, Tuple, List, Union
 from datetime import datetime
 
 import cv2
@@ -19,6 +19,12 @@ import numpy as np
 from PIL import Image
 from pyzbar.pyzbar import decode
 
+# SIMD base64 when available, same API as the stdlib module
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 try:
     import easyocr
     EASYOCR_AVAILABLE = True
@@ -31,6 +37,14 @@ logger = logging.getLogger(__name__)
 class FakeDocumentService:
     """Service for detecting fake or altered documents with comprehensive verification."""
     
+    # Aadhaar header phrases and title words, in English and Hindi
+    AADHAAR_HEADER_PHRASES = ("GOVERNMENT OF INDIA", "भारत सरकार", "GOVT OF INDIA")
+    AADHAAR_TITLE_WORDS = ("AADHAAR", "AADHAR", "आधार")
+    
+    # Orange/Red header range in HSV: H(0-25), S(100-255), V(100-255)
+    AADHAAR_HEADER_HSV_LOWER = np.array([0, 100, 100])
+    AADHAAR_HEADER_HSV_UPPER = np.array([25, 255, 255])
+    
     def __init__(self):
         self.model_version = "v4.0.0"
         self.confidence_threshold = 0.85
@@ -48,20 +62,28 @@ class FakeDocumentService:
             logger.error(f"[FAKE-DOC] ✗ Failed to load easyOCR: {str(e)}")
             self.ocr_engine = None
 
-        # Load Haar Cascade for face detection
-        try:
-            self.face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            logger.info("[FAKE-DOC] ✓ Face detection loaded")
-        except Exception as e:
-            logger.warning(f"[FAKE-DOC] Face detection unavailable: {e}")
-            self.face_cascade = None
+        # Haar Cascade for face detection, loaded per pool thread on first use
+        # because a CascadeClassifier is not safe to share across threads
+        self._local = threading.local()
         
         # CNN model placeholder
         self.cnn_model = None
         self._load_cnn_model()
     
+    @property
+    def face_cascade(self) -> Optional[cv2.CascadeClassifier]:
+        """Face detector owned by the calling thread, or None if it failed to load"""
+        local = self._local
+        if not hasattr(local, "face_cascade"):
+            try:
+                local.face_cascade = cv2.CascadeClassifier(
+                    cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+                )
+            except Exception as e:
+                logger.warning(f"[FAKE-DOC] Face detection unavailable: {e}")
+                local.face_cascade = None
+        return local.face_cascade
+    
     def _load_cnn_model(self):
         """Load CNN model for security feature detection (graceful fallback)."""
         try:
@@ -71,12 +93,12 @@ class FakeDocumentService:
             logger.warning(f"[FAKE-DOC] CNN model unavailable: {str(e)}")
             self.cnn_model = None
         
-    def analyze_document(self, document_image: str, document_type: Optional[str] = None) -> Dict[str, Any]:
+    def analyze_document(self, document_image: Union[str, bytes], document_type: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze a document image for authenticity and tampering.
         
         Args:
-            document_image: Base64 encoded image or file path
+            document_image: Base64 encoded image or raw image bytes
             document_type: Document type ('AADHAAR', 'PAN', or auto-detect)
             
         Returns:
@@ -126,12 +148,15 @@ class FakeDocumentService:
                 "processing_time_ms": int((time.time() - start_time) * 1000)
             }
     
-    def _decode_image(self, image_data: str) -> np.ndarray:
-        """Decode base64 image to numpy array."""
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
+    def _decode_image(self, image_data: Union[str, bytes]) -> np.ndarray:
+        """Decode base64 string or raw image bytes to numpy array."""
+        if isinstance(image_data, bytes):
+            image_bytes = image_data
+        else:
+            if image_data.startswith('data:image'):
+                image_data = image_data.split(',')[1]
+            image_bytes = base64.b64decode(image_data, validate=False)
         
-        image_bytes = base64.b64decode(image_data)
         image = Image.open(io.BytesIO(image_bytes))
         return np.array(image)
     
@@ -596,14 +621,10 @@ class FakeDocumentService:
             # Must have "भारत सरकार" (Government of India) or "GOVERNMENT OF INDIA"
             all_text = " ".join([item["text"].upper() for item in ocr_data])
             
-            has_govt_of_india = any(phrase in all_text for phrase in [
-                "GOVERNMENT OF INDIA",
-                "भारत सरकार",
-                "GOVT OF INDIA"
-            ])
+            has_govt_of_india = any(phrase in all_text for phrase in self.AADHAAR_HEADER_PHRASES)
             
             # Check for "AADHAAR" or "आधार" text
-            has_aadhaar_text = any(word in all_text for word in ["AADHAAR", "AADHAR", "आधार"])
+            has_aadhaar_text = any(word in all_text for word in self.AADHAAR_TITLE_WORDS)
             
             valid = has_govt_of_india and has_aadhaar_text
             
@@ -632,11 +653,7 @@ class FakeDocumentService:
             hsv = cv2.cvtColor(header_region, cv2.COLOR_BGR2HSV)
             
             # Orange/Red color range in HSV
-            # Orange: H(0-25), S(100-255), V(100-255)
-            lower_orange = np.array([0, 100, 100])
-            upper_orange = np.array([25, 255, 255])
-            
-            mask = cv2.inRange(hsv, lower_orange, upper_orange)
+            mask = cv2.inRange(hsv, self.AADHAAR_HEADER_HSV_LOWER, self.AADHAAR_HEADER_HSV_UPPER)
             orange_percentage = (np.sum(mask > 0) / mask.size) * 100
             
             # Authentic Aadhaar should have at least 3% orange in header
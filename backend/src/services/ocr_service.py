@@ -7,6 +7,7 @@ preprocessing, pattern matching, and confidence scoring.
 
 import os
 import re
+import asyncio
 import cv2
 import numpy as np
 import logging
@@ -14,6 +15,8 @@ from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime
 import uuid
 
+from src.utils.executor import CPU_POOL
+
 try:
     import easyocr
     EASYOCR_AVAILABLE = True
@@ -23,6 +26,10 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Bound in-flight OCR jobs so a burst of captures queues here instead of
+# piling decoded images into the shared CPU pool's backlog
+_OCR_SEM = asyncio.Semaphore(int(os.getenv("OCR_MAX_INFLIGHT", "4")))
+
 
 class OCRService:
     """Service for OCR processing and ID number extraction"""
@@ -285,7 +292,7 @@ class OCRService:
 
     async def process_id_document(self, image_data: bytes) -> Dict[str, Any]:
         """
-        Main OCR processing pipeline
+        Main OCR processing pipeline, run in the OCR thread pool
         
         Args:
             image_data: Raw image bytes
@@ -293,6 +300,12 @@ class OCRService:
         Returns:
             Dictionary with OCR results, extracted ID, confidence
         """
+        async with _OCR_SEM:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(CPU_POOL, self.process_id_document_sync, image_data)
+
+    def process_id_document_sync(self, image_data: bytes) -> Dict[str, Any]:
+        """Blocking OCR pipeline behind process_id_document"""
         start_time = datetime.now()
         
         try:
@@ -416,3 +429,14 @@ class OCRService:
                 'error': str(e),
                 'processing_time': processing_time
             }
+
+
+# Global singleton instance
+_ocr_service = None
+
+def get_ocr_service() -> OCRService:
+    """Get or create the global OCR service instance, loading the easyOCR models once"""
+    global _ocr_service
+    if _ocr_service is None:
+        _ocr_service = OCRService()
+    return _ocr_service
@@ -27,13 +27,40 @@ class DecisionRecommendation(str, Enum):
 class RiskEngine:
     """Advanced risk assessment engine using ML models and rule-based logic."""
     
+    # Risk levels in ascending order, indexed by risk_level_bounds bins
+    RISK_LEVELS = (RiskLevel.LOW, RiskLevel.MEDIUM, RiskLevel.HIGH, RiskLevel.CRITICAL)
+    
+    # Component order used by the batch scorer
+    COMPONENTS = ("document", "face_matching", "deepfake", "behavioral", "geolocation", "device")
+    
+    # Component name -> feature_weights key, built once instead of per assessment
+    COMPONENT_WEIGHT_KEYS = {
+        "document": "document_authenticity",
+        "face_matching": "face_matching",
+        "deepfake": "deepfake_detection",
+        "behavioral": "behavioral_analysis",
+        "geolocation": "geolocation",
+        "device": "device_fingerprint"
+    }
+    
+    # This would be configurable in production
+    HIGH_RISK_COUNTRIES = frozenset({"XX", "YY", "ZZ"})  # Placeholder country codes
+    
     def __init__(self):
         self.model_version = "RiskNet-v2.3"
+        # Instance generator instead of the legacy global RandomState
+        self.rng = np.random.Generator(np.random.SFC64())
         self.risk_thresholds = {
             "low": 250,
             "medium": 500,
             "high": 750
         }
+        # Upper bounds of the LOW, MEDIUM and HIGH levels for vectorized binning
+        self.risk_level_bounds = np.array([
+            self.risk_thresholds["low"],
+            self.risk_thresholds["medium"],
+            self.risk_thresholds["high"]
+        ], dtype=np.float64)
         self.feature_weights = {
             "document_authenticity": 0.25,
             "face_matching": 0.25,
@@ -42,6 +69,12 @@ class RiskEngine:
             "geolocation": 0.10,
             "device_fingerprint": 0.05
         }
+        # Normalized weights in COMPONENTS order, shared by the scalar and batch scorers
+        weights = np.array([
+            self.feature_weights[self.COMPONENT_WEIGHT_KEYS[component]]
+            for component in self.COMPONENTS
+        ], dtype=np.float64)
+        self.component_weights = weights / weights.sum()
     
     def calculate_risk_score(self, session_data: Dict[str, Any], 
                            additional_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -79,46 +112,127 @@ class RiskEngine:
                 "device": device_risk
             })
             
-            # Determine risk level and recommendation
-            risk_level = self._determine_risk_level(overall_risk)
-            recommendation = self._get_decision_recommendation(overall_risk, risk_level)
+            return self._build_assessment(
+                overall_risk,
+                {
+                    "document": document_risk,
+                    "face_matching": face_risk,
+                    "deepfake": deepfake_risk,
+                    "behavioral": behavioral_risk,
+                    "geolocation": geo_risk,
+                    "device": device_risk
+                },
+                start_time,
+                len(feature_scores)
+            )
             
-            # Identify contributing factors
-            factors = self._identify_risk_factors({
-                "document": document_risk,
-                "face_matching": face_risk,
-                "deepfake": deepfake_risk,
-                "behavioral": behavioral_risk,
-                "geolocation": geo_risk,
-                "device": device_risk
-            })
+        except Exception as e:
+            return self._create_error_response(str(e), start_time)
+    
+    def calculate_risk_score_batch(self, sessions_data: List[Dict[str, Any]],
+                                   additional_data: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Calculate risk scores for many sessions with vectorized component scoring.
+        
+        Produces the same assessments as calling calculate_risk_score per session;
+        missing (None) feature scores are treated as not analyzed.
+        
+        Args:
+            sessions_data: List of session data dicts including feature scores
+            additional_data: Additional context data applied to every session
+            
+        Returns:
+            List of risk assessment dictionaries in input order
+        """
+        start_time = time.time()
+        
+        if not sessions_data:
+            return []
+        
+        try:
+            # (N, 3) matrix of forgery, face match and deepfake scores
+            scores = np.array([
+                [
+                    session.get("forgeryScore") or 0,
+                    session.get("faceMatchScore") or 0,
+                    session.get("deepfakeScore") or 0
+                ]
+                for session in sessions_data
+            ], dtype=np.float64)
+            forgery, face_match, deepfake = scores.T
+            n = len(sessions_data)
             
-            processing_time = int((time.time() - start_time) * 1000)
+            # Per-session component risks, mirroring the scalar _calculate_*_risk methods
+            document_risk = np.where(forgery == 0, 500, np.minimum(1000, np.maximum(0, 100 - forgery) * 8))
+            face_risk = np.where(face_match == 0, 600, np.minimum(1000, np.maximum(0, 100 - face_match) * 7))
+            deepfake_risk = np.where(deepfake == 0, 400, np.minimum(1000, deepfake * 9))
             
-            return {
-                "risk_score": round(overall_risk, 2),
-                "risk_level": risk_level,
-                "recommendation": recommendation,
-                "confidence": self._calculate_confidence(overall_risk),
-                "component_scores": {
-                    "document_risk": round(document_risk, 2),
-                    "face_matching_risk": round(face_risk, 2),
-                    "deepfake_risk": round(deepfake_risk, 2),
-                    "behavioral_risk": round(behavioral_risk, 2),
-                    "geolocation_risk": round(geo_risk, 2),
-                    "device_risk": round(device_risk, 2)
-                },
-                "risk_factors": factors,
-                "processing_metadata": {
-                    "model_version": self.model_version,
-                    "processing_time_ms": processing_time,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "features_analyzed": len(feature_scores)
-                }
-            }
+            # Context-only components are shared across the batch, except the
+            # per-session rush check inside behavioral risk
+            if additional_data:
+                base_behavioral = self._calculate_behavioral_risk_without_rush(additional_data)
+                rushed = self.rng.random(n) < 0.1
+                behavioral_risk = np.minimum(1000, base_behavioral + rushed * 100)
+            else:
+                behavioral_risk = np.full(n, self._calculate_behavioral_risk({}, additional_data), dtype=np.float64)
+            geo_risk = np.full(n, self._calculate_geolocation_risk(additional_data), dtype=np.float64)
+            device_risk = np.full(n, self._calculate_device_risk(additional_data), dtype=np.float64)
+            
+            # (N, 6) component matrix against the (6,) weight vector
+            components = np.column_stack([
+                document_risk, face_risk, deepfake_risk, behavioral_risk, geo_risk, device_risk
+            ])
+            overall = components @ self.component_weights
+            
+            # Bin every overall score into a risk level in one pass; side="left"
+            # keeps each level's upper bound inclusive, as in _determine_risk_level
+            levels = np.searchsorted(self.risk_level_bounds, overall, side="left")
+            
+            return [
+                self._build_assessment(
+                    float(overall[i]),
+                    dict(zip(self.COMPONENTS, map(float, components[i]))),
+                    start_time,
+                    3,
+                    self.RISK_LEVELS[levels[i]]
+                )
+                for i in range(n)
+            ]
             
         except Exception as e:
-            return self._create_error_response(str(e), start_time)
+            return [self._create_error_response(str(e), start_time) for _ in sessions_data]
+    
+    def _build_assessment(self, overall_risk: float, component_risks: Dict[str, float],
+                          start_time: float, features_analyzed: int,
+                          risk_level: Optional[RiskLevel] = None) -> Dict[str, Any]:
+        """Assemble the assessment dict from the overall and component risks."""
+        if risk_level is None:
+            risk_level = self._determine_risk_level(overall_risk)
+        recommendation = self._get_decision_recommendation(overall_risk, risk_level)
+        factors = self._identify_risk_factors(component_risks)
+        processing_time = int((time.time() - start_time) * 1000)
+        
+        return {
+            "risk_score": round(overall_risk, 2),
+            "risk_level": risk_level,
+            "recommendation": recommendation,
+            "confidence": self._calculate_confidence(overall_risk),
+            "component_scores": {
+                "document_risk": round(component_risks["document"], 2),
+                "face_matching_risk": round(component_risks["face_matching"], 2),
+                "deepfake_risk": round(component_risks["deepfake"], 2),
+                "behavioral_risk": round(component_risks["behavioral"], 2),
+                "geolocation_risk": round(component_risks["geolocation"], 2),
+                "device_risk": round(component_risks["device"], 2)
+            },
+            "risk_factors": factors,
+            "processing_metadata": {
+                "model_version": self.model_version,
+                "processing_time_ms": processing_time,
+                "timestamp": datetime.utcnow().isoformat(),
+                "features_analyzed": features_analyzed
+            }
+        }
     
     def _extract_feature_scores(self, session_data: Dict[str, Any]) -> Dict[str, float]:
         """Extract and normalize feature scores from session data."""
@@ -164,11 +278,17 @@ class RiskEngine:
         if not additional_data:
             return 300  # Default medium-low risk
         
-        risk_factors = []
+        risk = self._calculate_behavioral_risk_without_rush(additional_data)
         
         # Check for suspicious timing patterns
         if self._detect_rush_behavior(session_data):
-            risk_factors.append(100)
+            risk += 100
+        
+        return min(1000, risk)
+    
+    def _calculate_behavioral_risk_without_rush(self, additional_data: Dict[str, Any]) -> float:
+        """Behavioral risk from context data alone, before the per-session rush check."""
+        risk_factors = []
         
         # Check for multiple attempts
         if additional_data.get("previous_attempts", 0) > 3:
@@ -185,7 +305,7 @@ class RiskEngine:
         if additional_data.get("device_changed", False):
             risk_factors.append(120)
         
-        return min(1000, sum(risk_factors))
+        return sum(risk_factors)
     
     def _calculate_geolocation_risk(self, additional_data: Optional[Dict[str, Any]]) -> float:
         """Calculate risk based on geolocation factors."""
@@ -203,7 +323,7 @@ class RiskEngine:
         
         # Check for high-risk countries
         country = additional_data.get("country", "")
-        if country in self._get_high_risk_countries():
+        if country in self.HIGH_RISK_COUNTRIES:
             risk += 150
         
         # Check for location-document mismatch
@@ -247,24 +367,8 @@ class RiskEngine:
     
     def _calculate_weighted_risk(self, component_risks: Dict[str, float]) -> float:
         """Calculate weighted overall risk score."""
-        total_score = 0
-        total_weight = 0
-        
-        for component, risk_score in component_risks.items():
-            weight_key = {
-                "document": "document_authenticity",
-                "face_matching": "face_matching",
-                "deepfake": "deepfake_detection",
-                "behavioral": "behavioral_analysis",
-                "geolocation": "geolocation",
-                "device": "device_fingerprint"
-            }.get(component, "behavioral_analysis")
-            
-            weight = self.feature_weights.get(weight_key, 0.1)
-            total_score += risk_score * weight
-            total_weight += weight
-        
-        return total_score / total_weight if total_weight > 0 else 500
+        risks = np.array([component_risks[component] for component in self.COMPONENTS], dtype=np.float64)
+        return float(risks @ self.component_weights)
     
     def _determine_risk_level(self, risk_score: float) -> RiskLevel:
         """Determine risk level based on score."""
@@ -327,12 +431,7 @@ class RiskEngine:
     def _detect_rush_behavior(self, session_data: Dict[str, Any]) -> bool:
         """Detect if user is rushing through verification process."""
         # Simulate rush behavior detection
-        return np.random.random() < 0.1  # 10% chance of rush behavior
-    
-    def _get_high_risk_countries(self) -> List[str]:
-        """Return list of countries considered high-risk."""
-        # This would be configurable in production
-        return ["XX", "YY", "ZZ"]  # Placeholder country codes
+        return self.rng.random() < 0.1  # 10% chance of rush behavior
     
     def _create_error_response(self, error_message: str, start_time: float) -> Dict[str, Any]:
         """Create standardized error response."""
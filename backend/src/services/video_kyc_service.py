@@ -6,12 +6,13 @@ import os
 import base64
 import uuid
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 import asyncpg
+from fastapi import UploadFile
 from src.schemas.video_kyc import (
     VideoKYCStatusEnum,
-    VerificationDecisionEnum,
+    VerificationDecision,
     VideoKYCSessionCreate,
     VideoKYCSessionUpdate,
     VideoKYCQuestionCreate,
@@ -20,9 +21,17 @@ from src.schemas.video_kyc import (
     VideoKYCVerificationResultCreate,
     MessageTypeEnum
 )
+from src.utils.uploads import save_upload
+from src.utils.cache import ResultCache
 
 logger = logging.getLogger(__name__)
 
+# Video KYC image upload limit
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Confirmed (session, user) ownership pairs; only positive answers are cached
+_OWNER_CACHE = ResultCache(max_entries=10_000, ttl_seconds=60.0)
+
 
 class VideoKYCService:
     """Service for Video KYC verification operations"""
@@ -78,15 +87,43 @@ class VideoKYCService:
             logger.error(f"[VIDEO-KYC] Failed to get session: {str(e)}")
             raise
 
+    async def is_session_owner(self, session_id: str, user_id: str) -> bool:
+        """Check that a Video KYC session exists and belongs to the user"""
+        
+        key = f"{session_id}:{user_id}"
+        if _OWNER_CACHE.get(key):
+            return True
+        
+        try:
+            async with self.pool.acquire() as conn:
+                is_owner = await conn.fetchval('''
+                    SELECT EXISTS(
+                        SELECT 1 FROM video_kyc_sessions WHERE id = $1 AND "userId" = $2
+                    )
+                ''', session_id, user_id)
+            
+            if is_owner:
+                _OWNER_CACHE.put(key, True)
+            return is_owner
+            
+        except Exception as e:
+            logger.error(f"[VIDEO-KYC] Failed to check session owner: {str(e)}")
+            raise
+
     async def update_session(self, session_id: str, 
-                           update_data: VideoKYCSessionUpdate) -> Dict[str, Any]:
-        """Update Video KYC session"""
+                           update_data: VideoKYCSessionUpdate,
+                           user_id: str) -> Optional[Dict[str, Any]]:
+        """Update a Video KYC session owned by user_id, or return None if it is not theirs"""
         
         try:
             data_dict = update_data.dict(exclude_none=True)
             
             if not data_dict:
-                return await self.get_session(session_id)
+                async with self.pool.acquire() as conn:
+                    session = await conn.fetchrow('''
+                        SELECT * FROM video_kyc_sessions WHERE id = $1 AND "userId" = $2
+                    ''', session_id, user_id)
+                    return dict(session) if session else None
             
             # Build dynamic UPDATE query
             set_clauses = []
@@ -99,83 +136,95 @@ class VideoKYCService:
                 param_num += 1
             
             # No updatedAt column in schema - remove this
-            # Add session_id for WHERE clause
+            # Add session_id and user_id for WHERE clause
             values.append(session_id)
+            values.append(user_id)
             
             query = f'''
                 UPDATE video_kyc_sessions 
                 SET {", ".join(set_clauses)}
-                WHERE id = ${param_num}
+                WHERE id = ${param_num} AND "userId" = ${param_num + 1}
                 RETURNING *
             '''
             
             async with self.pool.acquire() as conn:
                 result = await conn.fetchrow(query, *values)
-                return dict(result)
+                return dict(result) if result else None
                 
         except Exception as e:
             logger.error(f"[VIDEO-KYC] Failed to update session: {str(e)}")
             raise
 
     async def update_session_status(self, session_id: str, 
-                                   status: VideoKYCStatusEnum) -> Dict[str, Any]:
-        """Update session status"""
+                                   status: VideoKYCStatusEnum,
+                                   user_id: str) -> Optional[Dict[str, Any]]:
+        """Update the status of a session owned by user_id, or return None if it is not theirs"""
         
         try:
             async with self.pool.acquire() as conn:
                 result = await conn.fetchrow('''
                     UPDATE video_kyc_sessions 
                     SET "sessionStatus" = $1
-                    WHERE id = $2
+                    WHERE id = $2 AND "userId" = $3
                     RETURNING *
-                ''', status, session_id)
+                ''', status, session_id, user_id)
                 
-                return dict(result)
+                return dict(result) if result else None
                 
         except Exception as e:
             logger.error(f"[VIDEO-KYC] Failed to update session status: {str(e)}")
             raise
 
-    async def add_question(self, question_data: VideoKYCQuestionCreate) -> Dict[str, Any]:
-        """Add a question to Video KYC session"""
+    async def add_question(self, question_data: VideoKYCQuestionCreate,
+                          user_id: str) -> Optional[Dict[str, Any]]:
+        """Add a question to a session owned by user_id, or return None if it is not theirs"""
         
         try:
             async with self.pool.acquire() as conn:
                 question_id = str(uuid.uuid4())
                 
+                # The ownership check and insert run as one statement
                 result = await conn.fetchrow('''
                     INSERT INTO video_kyc_questions 
                     (id, "sessionId", "questionText", "questionType", "questionOrder", 
                      "validationRules", required, "askedAt")
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                    SELECT $1::text, s.id, $3::text, $4::text, $5::int, $6::jsonb, $7::boolean, $8::timestamp
+                    FROM video_kyc_sessions s
+                    WHERE s.id = $2 AND s."userId" = $9
                     RETURNING *
                 ''', question_id, question_data.sessionId, question_data.questionText,
                 question_data.questionType, question_data.questionOrder, question_data.validationRules,
-                question_data.required, datetime.utcnow())
+                question_data.required, datetime.utcnow(), user_id)
                 
-                return dict(result)
+                return dict(result) if result else None
                 
         except Exception as e:
             logger.error(f"[VIDEO-KYC] Failed to add question: {str(e)}")
             raise
 
-    async def add_answer(self, answer_data: VideoKYCAnswerCreate) -> Dict[str, Any]:
-        """Add an answer to a Video KYC question"""
+    async def add_answer(self, answer_data: VideoKYCAnswerCreate,
+                        user_id: str) -> Optional[Dict[str, Any]]:
+        """Add an answer in a session owned by user_id, or return None if it is not theirs"""
         
         try:
             async with self.pool.acquire() as conn:
                 answer_id = str(uuid.uuid4())
                 
-                # Create answer
+                # Create answer; the ownership check runs in the same statement
                 result = await conn.fetchrow('''
                     INSERT INTO video_kyc_answers 
                     (id, "sessionId", "questionId", "answerText", "answerType", 
                      "responseTime", "answeredAt")
-                    VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    SELECT $1::text, s.id, $3::text, $4::text, $5::text, $6::int, $7::timestamp
+                    FROM video_kyc_sessions s
+                    WHERE s.id = $2 AND s."userId" = $8
                     RETURNING *
                 ''', answer_id, answer_data.sessionId, answer_data.questionId,
                 answer_data.answerText, answer_data.answerType, answer_data.responseTime,
-                datetime.utcnow())
+                datetime.utcnow(), user_id)
+                
+                if not result:
+                    return None
                 
                 answer = dict(result)
                 
@@ -210,30 +259,34 @@ class VideoKYCService:
             logger.error(f"[VIDEO-KYC] Failed to add answer: {str(e)}")
             raise
 
-    async def add_chat_message(self, message_data: VideoKYCChatMessageCreate) -> Dict[str, Any]:
-        """Add a chat message to Video KYC session"""
+    async def add_chat_message(self, message_data: VideoKYCChatMessageCreate,
+                              user_id: str) -> Optional[Dict[str, Any]]:
+        """Add a chat message to a session owned by user_id, or return None if it is not theirs"""
         
         try:
             async with self.pool.acquire() as conn:
                 message_id = str(uuid.uuid4())
                 
+                # The ownership check and insert run as one statement
                 result = await conn.fetchrow('''
                     INSERT INTO video_kyc_chat_messages 
                     (id, "sessionId", "messageText", "messageType", timestamp)
-                    VALUES ($1, $2, $3, $4, $5)
+                    SELECT $1::text, s.id, $3::text, $4::text, $5::timestamp
+                    FROM video_kyc_sessions s
+                    WHERE s.id = $2 AND s."userId" = $6
                     RETURNING *
                 ''', message_id, message_data.sessionId, message_data.messageText,
-                message_data.messageType, datetime.utcnow())
+                message_data.messageType, datetime.utcnow(), user_id)
                 
-                return dict(result)
+                return dict(result) if result else None
                 
         except Exception as e:
             logger.error(f"[VIDEO-KYC] Failed to add chat message: {str(e)}")
             raise
 
-    async def save_uploaded_file(self, session_id: str, file_data: bytes, 
+    async def save_uploaded_file(self, session_id: str, file: UploadFile, 
                                 file_type: str, filename: str) -> str:
-        """Save uploaded file and return file path"""
+        """Stream uploaded file to disk and return file path"""
         
         try:
             session_dir = os.path.join(self.upload_dir, session_id)
@@ -242,9 +295,8 @@ class VideoKYCService:
             file_extension = os.path.splitext(filename)[1]
             file_path = os.path.join(session_dir, f"{file_type}{file_extension}")
             
-            # Save file
-            with open(file_path, "wb") as f:
-                f.write(file_data)
+            # Save file in chunks rather than buffering the whole upload
+            await save_upload(file, file_path, MAX_UPLOAD_BYTES)
             
             # Update session with file path
             field_map = {
@@ -267,24 +319,31 @@ class VideoKYCService:
             logger.error(f"[VIDEO-KYC] Failed to save uploaded file: {str(e)}")
             raise
 
-    async def add_verification_result(self, result_data: VideoKYCVerificationResultCreate) -> Dict[str, Any]:
-        """Add a verification result to Video KYC session"""
+    async def add_verification_result(self, result_data: VideoKYCVerificationResultCreate,
+                                     user_id: str) -> Optional[Dict[str, Any]]:
+        """Add a verification result to a session owned by user_id, or return None if it is not theirs"""
         
         try:
             async with self.pool.acquire() as conn:
                 result_id = str(uuid.uuid4())
                 
-                # Create verification result
+                # Create verification result; the ownership check runs in the same statement
                 result = await conn.fetchrow('''
                     INSERT INTO video_kyc_verification_results 
                     (id, "sessionId", "verificationType", score, confidence, "isPassed", 
                      details, "modelVersion", "processingTime", "processedAt")
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+                    SELECT $1::text, s.id, $3::text, $4::float8, $5::float8, $6::boolean,
+                           $7::jsonb, $8::text, $9::int, $10::timestamp
+                    FROM video_kyc_sessions s
+                    WHERE s.id = $2 AND s."userId" = $11
                     RETURNING *
                 ''', result_id, result_data.sessionId, result_data.verificationType,
                 result_data.score, result_data.confidence, result_data.isPassed,
                 result_data.details, result_data.modelVersion, result_data.processingTime,
-                datetime.utcnow())
+                datetime.utcnow(), user_id)
+                
+                if not result:
+                    return None
                 
                 verification_result = dict(result)
                 
@@ -337,17 +396,15 @@ class VideoKYCService:
             logger.error(f"[VIDEO-KYC] Failed to add verification result: {str(e)}")
             raise
 
-    async def run_ai_analysis(self, session_id: str) -> Dict[str, Any]:
-        """Run AI analysis on Video KYC session"""
+    async def run_ai_analysis(self, session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Run AI analysis on a session owned by user_id, or return None if it is not theirs"""
         
         try:
-            session = await self.get_session(session_id)
+            # Update status to AI Analysis; the returned row is the session to analyze
+            session = await self.update_session_status(session_id, VideoKYCStatusEnum.AI_ANALYSIS, user_id)
             
             if not session:
-                raise ValueError("Session not found")
-            
-            # Update status to AI Analysis
-            await self.update_session_status(session_id, VideoKYCStatusEnum.AI_ANALYSIS)
+                return None
             
             analysis_results = {
                 "documentVerified": session.get("documentVerified", False),
@@ -385,27 +442,31 @@ class VideoKYCService:
             logger.error(f"[VIDEO-KYC] Failed to run AI analysis: {str(e)}")
             raise
 
-    async def complete_session(self, session_id: str, final_decision: VerificationDecisionEnum,
+    async def complete_session(self, session_id: str, final_decision: VerificationDecision,
+                              user_id: str,
                               agent_name: Optional[str] = None, 
                               agent_review_notes: Optional[str] = None,
-                              rejection_reason: Optional[str] = None) -> Dict[str, Any]:
-        """Complete Video KYC session with final decision"""
+                              rejection_reason: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Complete a session owned by user_id with a final decision, or return None if it is not theirs"""
         
         try:
-            status = VideoKYCStatusEnum.COMPLETED if final_decision == VerificationDecisionEnum.APPROVED else VideoKYCStatusEnum.REJECTED
+            status = VideoKYCStatusEnum.COMPLETED if final_decision == VerificationDecision.APPROVED else VideoKYCStatusEnum.REJECTED
             
             async with self.pool.acquire() as conn:
                 result = await conn.fetchrow('''
                     UPDATE video_kyc_sessions 
                     SET "sessionStatus" = $1, "finalDecision" = $2, "sessionCompletedAt" = $3,
                         "agentName" = $4, "agentReviewNotes" = $5, "rejectionReason" = $6
-                    WHERE id = $7
+                    WHERE id = $7 AND "userId" = $8
                     RETURNING *
                 ''', status, final_decision, datetime.utcnow(), agent_name, agent_review_notes,
-                rejection_reason, session_id)
+                rejection_reason, session_id, user_id)
                 
+                if not result:
+                    return None
                 session = dict(result)
             
+            _OWNER_CACHE.discard(f"{session_id}:{user_id}")
             logger.info(f"[VIDEO-KYC] Session {session_id} completed with decision: {final_decision}")
             return session
             
@@ -422,7 +483,7 @@ class VideoKYCService:
                 results = await conn.fetch('''
                     SELECT * FROM video_kyc_sessions 
                     WHERE "userId" = $1
-                    ORDER BY "sessionStartedAt" DESC
+                    ORDER BY "sessionStartedAt" DESC, id DESC
                     LIMIT $2 OFFSET $3
                 ''', user_id, limit, skip)
                 
@@ -432,6 +493,58 @@ class VideoKYCService:
             logger.error(f"[VIDEO-KYC] Failed to get user sessions: {str(e)}")
             raise
 
+    async def get_user_sessions_with_count(self, user_id: str, limit: int = 10,
+                                          skip: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Get a page of the user's Video KYC sessions and their total count in one query"""
+        
+        try:
+            async with self.pool.acquire() as conn:
+                results = await conn.fetch('''
+                    SELECT *, COUNT(*) OVER() AS "totalCount" FROM video_kyc_sessions 
+                    WHERE "userId" = $1
+                    ORDER BY "sessionStartedAt" DESC, id DESC
+                    LIMIT $2 OFFSET $3
+                ''', user_id, limit, skip)
+                
+                if not results:
+                    # A page past the end carries no window count
+                    total = await conn.fetchval('''
+                        SELECT COUNT(*) FROM video_kyc_sessions WHERE "userId" = $1
+                    ''', user_id) if skip else 0
+                    return [], total
+                
+                total = results[0]["totalCount"]
+                sessions = []
+                for row in results:
+                    session = dict(row)
+                    del session["totalCount"]
+                    sessions.append(session)
+                return sessions, total
+                
+        except Exception as e:
+            logger.error(f"[VIDEO-KYC] Failed to get user sessions: {str(e)}")
+            raise
+
+    async def get_user_sessions_after(self, user_id: str, cursor: Tuple[datetime, str],
+                                      limit: int = 10) -> List[Dict[str, Any]]:
+        """Get the user's Video KYC sessions that follow a (sessionStartedAt, id) keyset cursor"""
+        
+        try:
+            started_at, session_id = cursor
+            async with self.pool.acquire() as conn:
+                results = await conn.fetch('''
+                    SELECT * FROM video_kyc_sessions 
+                    WHERE "userId" = $1 AND ("sessionStartedAt", id) < ($2, $3)
+                    ORDER BY "sessionStartedAt" DESC, id DESC
+                    LIMIT $4
+                ''', user_id, started_at, session_id, limit)
+                
+                return [dict(row) for row in results]
+                
+        except Exception as e:
+            logger.error(f"[VIDEO-KYC] Failed to get user sessions: {str(e)}")
+            raise
+
     async def get_session_count(self, user_id: str) -> int:
         """Get count of user's Video KYC sessions"""
         
@@ -449,7 +562,7 @@ class VideoKYCService:
 
     async def save_id_document(self, session_id: str, id_number: str, 
                               full_text: str, ocr_json: Dict[str, Any], 
-                              confidence: float) -> str:
+                              confidence: float, user_id: str) -> Optional[str]:
         """
         Save OCR result from ID document to database
         
@@ -459,23 +572,29 @@ class VideoKYCService:
             full_text: Full text extracted from document
             ocr_json: Complete OCR result JSON
             confidence: Confidence score
+            user_id: User who must own the session
             
         Returns:
-            Document ID
+            Document ID, or None if the session does not exist or is not the user's
         """
         try:
-            async with self.pool.acquire() as conn:
-                document_id = str(uuid.uuid4())
+            async with self.pool.acquire() as conn, conn.transaction():
+                now = datetime.utcnow()
                 
-                await conn.execute('''
+                # The ownership check and insert run as one statement
+                document_id = await conn.fetchval('''
                     INSERT INTO video_kyc_documents 
                     (id, "sessionId", "idNumber", "fullText", "ocrJson", confidence, 
                      "isValid", "createdAt", "processedAt")
-                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                ''', document_id, session_id, id_number, full_text, ocr_json, 
-                confidence, confidence >= 0.7, datetime.utcnow(), datetime.utcnow())
-                
-                logger.info(f"[VIDEO-KYC] ID document saved: {document_id}")
+                    SELECT $1::text, s.id, $3::text, $4::text, $5::jsonb, $6::float8, $7::boolean, $8::timestamp, $8::timestamp
+                    FROM video_kyc_sessions s
+                    WHERE s.id = $2 AND s."userId" = $9
+                    RETURNING id
+                ''', str(uuid.uuid4()), session_id, id_number, full_text, ocr_json,
+                confidence, confidence >= 0.7, now, user_id)
+                
+                if document_id:
+                    logger.info(f"[VIDEO-KYC] ID document saved: {document_id}")
                 return document_id
                 
         except Exception as e:
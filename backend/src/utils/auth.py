@@ -4,8 +4,10 @@ Handles JWT token generation, validation, and user authentication.
 """
 
 import os
+import time
 import jwt
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -28,6 +30,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Bearer token scheme
 security = HTTPBearer()
 
+# Bearer scheme for endpoints where authentication is only needed for some requests
+optional_security = HTTPBearer(auto_error=False)
+
 class AuthService:
     """Service for handling authentication operations."""
     
@@ -82,6 +87,25 @@ class AuthService:
         except jwt.PyJWTError:
             return None
 
+@lru_cache(maxsize=1024)
+def _decode_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verify an access token's signature and type once per distinct token
+    
+    Expiry is not checked here because results are cached; callers compare
+    the exp claim against the current time on every use.
+    """
+    try:
+        payload = jwt.decode(
+            token, SECRET_KEY, algorithms=[ALGORITHM],
+            options={"verify_exp": False, "require": ["exp"]}
+        )
+    except jwt.PyJWTError:
+        return None
+    
+    if payload.get("type") != "access":
+        return None
+    return payload
+
 # Dependency functions
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
@@ -99,9 +123,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         token = credentials.credentials
         logger.info(f"[AUTH] Token received: {token[:20]}...")
         
-        # Verify token
-        payload = AuthService.verify_token(token, "access")
-        if payload is None:
+        # Verify token; signature checks are cached per token, expiry is not
+        payload = _decode_access_token(token)
+        if payload is None or payload["exp"] < time.time():
             logger.error("[AUTH] Token verification failed: invalid or expired")
             raise credentials_exception
         
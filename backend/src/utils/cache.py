@@ -0,0 +1,63 @@
+"""
+In-memory result cache for repeated image analysis requests.
+Keys are content hashes of the raw image bytes, so resubmitting the
+same upload returns the stored result instead of re-running the model.
+The same TTL LRU also backs small lookups such as session ownership.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def image_key(*parts: Any) -> str:
+    """Build a cache key from image bytes and any extra string parameters"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        elif part is None:
+            part = b""
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU cache of result dicts with a per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on miss or expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a copy of the result, evicting the least recently used entry"""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        """Drop an entry if present"""
+        with self._lock:
+            self._entries.pop(key, None)
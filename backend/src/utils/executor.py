@@ -0,0 +1,13 @@
+"""
+Shared thread pool for CPU-bound image work.
+
+OpenCV, numpy and easyOCR release the GIL, so face matching, document
+analysis and OCR all run here instead of on the event loop. Sizing one
+pool to the core count caps how many of those jobs run at once across
+every router.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+CPU_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="cpu")
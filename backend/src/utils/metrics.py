@@ -0,0 +1,55 @@
+"""
+Prometheus metrics for request latency and per-phase e-KYC timings.
+Exposed by the application at /metrics.
+"""
+
+import time
+from fastapi import Request
+from prometheus_client import Histogram
+
+# Per-phase buckets in seconds, sized for OCR and face matching latencies
+PHASE_BUCKETS = (.05, .1, .25, .5, 1, 2, 5)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+
+UPLOAD_READ_SECONDS = Histogram(
+    "ekyc_upload_read_seconds",
+    "Time spent reading uploaded images",
+    buckets=PHASE_BUCKETS,
+)
+OCR_SECONDS = Histogram(
+    "ekyc_ocr_seconds",
+    "Time spent running OCR and field extraction",
+    buckets=PHASE_BUCKETS,
+)
+FACE_MATCH_SECONDS = Histogram(
+    "ekyc_face_match_seconds",
+    "Time spent matching ID and selfie faces, including queueing",
+    buckets=PHASE_BUCKETS,
+)
+DB_INSERT_SECONDS = Histogram(
+    "ekyc_db_insert_seconds",
+    "Time spent writing e-KYC results to the database",
+    buckets=PHASE_BUCKETS,
+)
+
+
+async def prometheus_middleware(request: Request, call_next):
+    """Record request latency labelled by route template rather than raw path"""
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        ).observe(time.perf_counter() - start)
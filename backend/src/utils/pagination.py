@@ -0,0 +1,20 @@
+"""
+Opaque keyset cursors for history endpoints.
+A cursor encodes the (timestamp, id) position of the last row on a page.
+"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(timestamp: datetime, row_id: str) -> str:
+    """Encode a row's (timestamp, id) keyset position as an opaque cursor"""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor, raising ValueError if malformed"""
+    timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    return datetime.fromisoformat(timestamp), row_id
@@ -0,0 +1,81 @@
+"""
+Response builders that avoid re-encoding JSON already stored in Postgres
+and skip Pydantic for large read-only listings.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+from src.schemas.ekyc import EkycDocumentResponse, EkycResultResponse, EkycSessionResponse
+from src.schemas.video_kyc import VideoKYCSessionResponse
+
+
+def feature_result_response(feature_result: Dict[str, Any]) -> Response:
+    """Build a FeatureRunResponse-shaped body, splicing the stored metadata JSON in verbatim"""
+    metadata = feature_result["metadata"]
+    if isinstance(metadata, str):
+        metadata = orjson.Fragment(metadata)
+    
+    body = orjson.dumps({
+        "session_id": feature_result["sessionId"],
+        "feature_name": feature_result["featureName"],
+        "score": feature_result["score"],
+        "metadata": metadata,
+        "processing_time_ms": None,
+        "status": "completed",
+        "created_at": feature_result["createdAt"],
+    })
+    return Response(content=body, media_type="application/json")
+
+
+def _output_keys(model: type[BaseModel]) -> tuple:
+    """Keys a response model serializes to, which match the table's column names"""
+    return tuple(field.alias or name for name, field in model.model_fields.items())
+
+
+_EKYC_SESSION_KEYS = tuple(
+    key for key in _output_keys(EkycSessionResponse) if key not in ("documents", "results")
+)
+_EKYC_DOCUMENT_KEYS = _output_keys(EkycDocumentResponse)
+_EKYC_RESULT_KEYS = _output_keys(EkycResultResponse)
+_VIDEO_KYC_SESSION_KEYS = _output_keys(VideoKYCSessionResponse)
+
+
+def _project(row: Dict[str, Any], keys: tuple) -> Dict[str, Any]:
+    return {key: row.get(key) for key in keys}
+
+
+def ekyc_history_response(sessions: List[Dict[str, Any]], total: Optional[int], page: int,
+                          page_size: int, next_cursor: Optional[str]) -> Response:
+    """Serialize an EkycSessionHistoryResponse-shaped page of hydrated session rows with orjson"""
+    body = orjson.dumps({
+        "sessions": [
+            {
+                **_project(session, _EKYC_SESSION_KEYS),
+                "documents": [_project(d, _EKYC_DOCUMENT_KEYS) for d in session["documents"]],
+                "results": [_project(r, _EKYC_RESULT_KEYS) for r in session["results"]],
+            }
+            for session in sessions
+        ],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+    })
+    return Response(content=body, media_type="application/json")
+
+
+def video_kyc_history_response(sessions: List[Dict[str, Any]], total: Optional[int], page: int,
+                               page_size: int, next_cursor: Optional[str]) -> Response:
+    """Serialize a VideoKYCSessionHistoryResponse-shaped page of session rows with orjson"""
+    body = orjson.dumps({
+        "sessions": [_project(session, _VIDEO_KYC_SESSION_KEYS) for session in sessions],
+        "total": total,
+        "page": page,
+        "pageSize": page_size,
+        "nextCursor": next_cursor,
+    })
+    return Response(content=body, media_type="application/json")
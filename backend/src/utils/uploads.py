@@ -0,0 +1,129 @@
+"""
+Upload helpers that bound memory use for multipart file uploads.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import aiofiles
+from fastapi import HTTPException, Request, UploadFile, status
+
+# Read uploads in 1MB chunks
+_CHUNK_SIZE = 1024 * 1024
+
+# Allowance for multipart boundaries and form fields on top of file bytes
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+# Image content types accepted by the upload endpoints
+ALLOWED_IMAGE_TYPES = frozenset({
+    "image/jpeg", "image/jpg", "image/png", "image/bmp", "image/tiff", "image/webp",
+})
+
+
+def is_allowed_image(file: UploadFile) -> bool:
+    """Check the upload's declared content type against ALLOWED_IMAGE_TYPES"""
+    return (file.content_type or "").lower() in ALLOWED_IMAGE_TYPES
+
+
+def check_content_length(request: Request, max_bytes: int) -> None:
+    """Reject a request whose declared body is larger than max_bytes of files allows"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + _MULTIPART_OVERHEAD:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request too large. Maximum {max_bytes // (1024 * 1024)}MB allowed"
+        )
+
+
+def _too_large(file: UploadFile, max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File {file.filename} too large. Maximum {max_bytes // (1024 * 1024)}MB allowed"
+    )
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """Read an upload, stopping as soon as it exceeds max_bytes"""
+    # Spooled uploads know their size: check it and read in one allocation
+    if file.size is not None:
+        if file.size > max_bytes:
+            raise _too_large(file, max_bytes)
+        return await file.read()
+    
+    chunks = []
+    total = 0
+    while chunk := await file.read(_CHUNK_SIZE):
+        total += len(chunk)
+        if total > max_bytes:
+            raise _too_large(file, max_bytes)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def save_upload(file: UploadFile, path: str, max_bytes: int) -> int:
+    """Stream an upload to path in chunks, returning the number of bytes written
+    
+    The partial file is removed if the upload exceeds max_bytes.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(file, max_bytes)
+    
+    total = 0
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while chunk := await file.read(_CHUNK_SIZE):
+                total += len(chunk)
+                if total > max_bytes:
+                    raise _too_large(file, max_bytes)
+                await out.write(chunk)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return total
+
+
+def _readinto(fileobj, buf: bytearray) -> int:
+    """Fill buf from fileobj, returning the byte count, or len(buf) + 1 if the file is larger"""
+    view = memoryview(buf)
+    total = 0
+    while total < len(buf):
+        read = fileobj.readinto(view[total:])
+        if not read:
+            return total
+        total += read
+    return total + 1 if fileobj.read(1) else total
+
+
+class UploadBufferPool:
+    """Preallocated bytearrays that uploads are read into instead of fresh bytes objects
+    
+    A caller that exits with an error gives up its buffer for a new one, since work
+    it started in a thread may still be reading from it.
+    """
+    
+    def __init__(self, count: int, size: int):
+        self.size = size
+        self._free: asyncio.Queue = asyncio.Queue()
+        for _ in range(count):
+            self._free.put_nowait(bytearray(size))
+    
+    @asynccontextmanager
+    async def read(self, file: UploadFile):
+        """Read an upload into a pooled buffer, yielding a memoryview of its bytes"""
+        if file.size is not None and file.size > self.size:
+            raise _too_large(file, self.size)
+        
+        buf = await self._free.get()
+        try:
+            length = await asyncio.to_thread(_readinto, file.file, buf)
+            if length > self.size:
+                raise _too_large(file, self.size)
+            yield memoryview(buf)[:length]
+        except BaseException:
+            self._free.put_nowait(bytearray(self.size))
+            raise
+        else:
+            self._free.put_nowait(buf)